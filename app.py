@@ -2,24 +2,158 @@
 Flask Web Dashboard for Unified News Monitor
 """
 
-from flask import Flask, render_template, jsonify
-import json
+from flask import Flask, render_template, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+import orjson
+import mmap
+import os
+import threading
+import time
+from collections import deque
 from datetime import datetime
+from functools import lru_cache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (used by jsonify)"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
-HEADLINES_DB_FILE = "headlines_database.json"
+HEADLINES_DB_FILE = "headlines_database.jsonl"
+MAX_HEADLINES = 100
 
+DASHBOARD_HOST = "0.0.0.0"
+DASHBOARD_PORT = 5000
+DASHBOARD_THREADS = 8
 
-def load_headlines():
-    """Load headlines from database"""
+# Run the news monitor in a background thread of this process and serve the
+# dashboard from memory instead of re-reading the database file
+EMBED_MONITOR = os.getenv("EMBED_MONITOR", "false").lower() == "true"
+
+EMBEDDED_MONITOR_RESTART_SECONDS = 10  # Delay before restarting a crashed embedded monitor
+
+_recent_headlines = deque(maxlen=MAX_HEADLINES)  # Newest first (EMBED_MONITOR only)
+_recent_lock = threading.Lock()
+_recent_version = 0
+_process_started_ns = time.time_ns()
+
+
+def _read_tail_lines(buf, max_lines):
+    """Return up to max_lines non-empty lines from the end of buf, newest first"""
+    lines = []
+    end = len(buf)
+    while end > 0 and len(lines) < max_lines:
+        start = buf.rfind(b'\n', 0, end - 1) + 1
+        line = buf[start:end].strip()
+        if line:
+            lines.append(line)
+        end = start
+    return lines
+
+
+@lru_cache(maxsize=1)
+def _load_headlines_cached(mtime_ns, size):
+    """Parse the database once per (mtime, size) version of the file"""
+    with open(HEADLINES_DB_FILE, 'rb') as f:
+        # Map the file instead of read() so parsing works straight from the page cache
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lines = _read_tail_lines(mm, MAX_HEADLINES)
+
+    headlines = []
+    for line in lines:
+        try:
+            headlines.append(orjson.loads(line))
+        except orjson.JSONDecodeError:
+            continue
+    return headlines
+
+
+def _seed_recent_headlines(entries):
+    """Replace the in-memory headlines with a newest-first list"""
+    global _recent_version
+    with _recent_lock:
+        _recent_headlines.clear()
+        _recent_headlines.extend(entries)
+        _recent_version += 1
+
+
+def _on_headline_saved(entry):
+    """Monitor callback: put a newly saved headline at the top"""
+    global _recent_version
+    with _recent_lock:
+        _recent_headlines.appendleft(entry)
+        _recent_version += 1
+
+
+def _run_embedded_monitor():
+    """
+    Run main.py's monitor loop, mirroring saved headlines into memory.
+    Restarted after EMBEDDED_MONITOR_RESTART_SECONDS if it raises, so a
+    crash doesn't leave the dashboard up with no monitor behind it.
+    """
+    import main as monitor
+
+    monitor.add_headline_listener(_on_headline_saved)
+    while True:
+        try:
+            last_check = monitor.startup()
+            # startup() may have cleaned the database, so reseed from it
+            _seed_recent_headlines(monitor.load_headlines_db())
+            monitor.set_baseline(last_check)
+            monitor.run_forever()
+        except Exception as e:
+            monitor.log_error("embedded_monitor", str(e))
+            print(f"News monitor error: {e}")
+        time.sleep(EMBEDDED_MONITOR_RESTART_SECONDS)
+
+
+def start_embedded_monitor():
+    """Start the news monitor in a daemon thread of this process"""
+    _seed_recent_headlines(_load_headlines_from_disk())
+    threading.Thread(target=_run_embedded_monitor, name="news-monitor", daemon=True).start()
+
+
+def _headlines_etag():
+    """ETag for the current version of the headlines, or None if there are none"""
+    if EMBED_MONITOR:
+        return f"{_process_started_ns}-{_recent_version}"
     try:
-        with open(HEADLINES_DB_FILE, 'r') as f:
-            return json.load(f)
+        st = os.stat(HEADLINES_DB_FILE)
+    except OSError:
+        return None
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+def _load_headlines_from_disk():
+    """Load headlines from the NDJSON database, newest first"""
+    try:
+        st = os.stat(HEADLINES_DB_FILE)
+        if st.st_size == 0:
+            return []
+        return _load_headlines_cached(st.st_mtime_ns, st.st_size)
     except:
         return []
 
 
+def load_headlines():
+    """Current headlines, newest first"""
+    if EMBED_MONITOR:
+        with _recent_lock:
+            return list(_recent_headlines)
+    return _load_headlines_from_disk()
+
+
 @app.route('/')
 def index():
     """Main dashboard page"""
@@ -31,10 +165,47 @@ def index():
 @app.route('/api/headlines')
 def api_headlines():
     """API endpoint for headlines"""
-    headlines = load_headlines()
-    # Database already has newest first (index 0)
-    return jsonify(headlines)
+    # The database only changes when a headline is saved, so pollers that
+    # already hold the current version get an empty 304
+    etag = _headlines_etag()
+    if etag and etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        headlines = load_headlines()
+        # Database already has newest first (index 0)
+        response = jsonify(headlines)
+    if etag:
+        response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+
+def run_server():
+    """Serve the dashboard with waitress so concurrent polls don't queue up"""
+    from waitress import serve
+    serve(app, host=DASHBOARD_HOST, port=DASHBOARD_PORT, threads=DASHBOARD_THREADS)
+
+
+def serve_dashboard():
+    """Serve the dashboard until the server stops"""
+    if os.getenv("FLASK_DEV", "false").lower() == "true":
+        # Werkzeug dev server, for local debugging only
+        app.run(host=DASHBOARD_HOST, port=DASHBOARD_PORT, debug=False)
+    else:
+        run_server()
+
+
+def main():
+    """Serve the dashboard, starting the embedded monitor first if configured"""
+    if EMBED_MONITOR:
+        start_embedded_monitor()
+    else:
+        # The monitor converts a pre-NDJSON database at startup; do it here too
+        # so the dashboard isn't empty when started before the monitor has run
+        import main as monitor
+        monitor.migrate_legacy_headlines_db()
+    serve_dashboard()
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    main()
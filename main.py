@@ -2,23 +2,35 @@
 Unified News Monitor - Nuvama + Stockwatch
 Runs continuously, checking every 1 minute
 Handles restarts gracefully using persistent timestamp tracking
-Two-layer deduplication: exact (MD5) + contextual (similarity scoring)
+Two-layer deduplication: exact (BLAKE2b) + contextual (similarity scoring)
 """
 
+import atexit
 import sys
 import hashlib
 import time
-import json
+import orjson
 import os
 import csv
+import sqlite3
+from collections import deque
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from difflib import SequenceMatcher
-from urllib.parse import unquote, parse_qs, urlparse
+from html.parser import HTMLParser
+from urllib.parse import unquote
 import requests
-from playwright.sync_api import sync_playwright
+from requests.adapters import HTTPAdapter
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 import re
 from dotenv import load_dotenv
 
+try:
+    from rapidfuzz.fuzz import ratio as _fuzz_ratio
+    from rapidfuzz.process import extract as _fuzz_extract
+except ImportError:  # Falls back to difflib's pure-Python SequenceMatcher
+    _fuzz_ratio = _fuzz_extract = None
+
 # Fix Windows console encoding to support Unicode (₹, emojis, etc.)
 if sys.stdout.encoding != 'utf-8':
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
@@ -31,9 +43,24 @@ load_dotenv()
 # CONFIGURATION
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+# Credentials come only from the environment; without them sends are skipped
+TELEGRAM_ENABLED = bool(TELEGRAM_TOKEN and CHAT_ID)
 NUVAMA_URL = "https://www.nuvamawealth.com/live-news"
 STOCKWATCH_URL = "https://www.stockwatch.live/dashboard"
 CHECK_INTERVAL_SECONDS = 60
+# Telegram allows roughly one message per second to the same chat
+TELEGRAM_MIN_INTERVAL_SECONDS = 1.05
+HTTP_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+# NUVAMA HTTP FAST PATH - try a plain HTTP fetch before launching the browser
+NUVAMA_HTTP_FETCH = os.getenv("NUVAMA_HTTP_FETCH", "false").lower() == "true"
+
+# NUVAMA JSON API - the feed's XHR endpoint (from DevTools > Network); when set it
+# is used instead of the page, with the browser as fallback
+NUVAMA_API_URL = os.getenv("NUVAMA_API_URL", "")
 
 # RESULTS FILTER - skip earnings/results headlines from Telegram (still saved to dashboard)
 EXCLUDE_RESULTS_ALERTS = os.getenv("EXCLUDE_RESULTS_ALERTS", "false").lower() == "true"
@@ -47,104 +74,235 @@ ADDITIONAL_CSV_PATH = os.getenv("ADDITIONAL_CSV_PATH", "")
 
 # CONTEXTUAL DEDUP
 ENABLE_EMBEDDING_DEDUP = os.getenv("ENABLE_EMBEDDING_DEDUP", "false").lower() == "true"
-EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+# sbert (sentence-transformers) or model2vec (static embeddings, much faster on CPU)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sbert").lower()
+EMBEDDING_MODEL_NAME = os.getenv(
+    "EMBEDDING_MODEL_NAME",
+    "minishlab/potion-base-8M" if EMBEDDING_BACKEND == "model2vec" else "sentence-transformers/all-MiniLM-L6-v2"
+)
 CONTEXTUAL_DEDUP_THRESHOLD = float(os.getenv("CONTEXTUAL_DEDUP_THRESHOLD", "0.68"))
 
 # STATE FILES
-HISTORY_FILE = "headlines_seen.json"
-HEADLINES_DB_FILE = "headlines_database.json"
+HISTORY_FILE = "headlines_seen.db"
+LEGACY_HISTORY_FILE = "headlines_seen.json"
+HEADLINES_DB_FILE = "headlines_database.jsonl"
+LEGACY_HEADLINES_DB_FILE = "headlines_database.json"
 LAST_CHECK_FILE = "last_check_timestamp.json"
-ERROR_LOG_FILE = "error_log.json"
-CONTEXT_MEMORY_FILE = "alerts_context_memory.json"
+ERROR_LOG_FILE = "error_log.jsonl"
+CONTEXT_MEMORY_FILE = "alerts_context_memory.jsonl"
+LEGACY_CONTEXT_MEMORY_FILE = "alerts_context_memory.json"
+
+# Seen IDs: the last SEEN_MEMORY_HOURS stay in memory; SQLite keeps them
+# for SEEN_RETENTION_DAYS and answers lookups for anything older
+SEEN_MEMORY_HOURS = 48
+SEEN_RETENTION_DAYS = 30
+
+# Headlines DB is append-only NDJSON (oldest first); compacted to the newest
+# HEADLINES_DB_MAX_ENTRIES once it grows past twice that many lines
+HEADLINES_DB_MAX_ENTRIES = 100
+
+# Error log is append-only NDJSON; trimmed to the newest ERROR_LOG_MAX_ENTRIES
+# on the first error of a run and after every ERROR_LOG_MAX_ENTRIES appends
+ERROR_LOG_MAX_ENTRIES = 100
+
+# Context memory keeps alerts from the last CONTEXT_MEMORY_HOURS (at most
+# CONTEXT_MEMORY_MAX_ENTRIES). On disk it is append-only NDJSON, expired lines
+# are dropped on load and the file is compacted past twice the maximum
+CONTEXT_MEMORY_HOURS = 24
+CONTEXT_MEMORY_MAX_ENTRIES = 200
 
 # IST timezone (UTC+5:30)
 IST = timezone(timedelta(hours=5, minutes=30))
 
 
+def atomic_write(path, data):
+    """
+    Replace path with data (bytes) via a temp file and os.replace, so a crash
+    mid-write leaves the old file intact. One fsync before the swap.
+    """
+    tmp = path + ".tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+_error_log_appends = ERROR_LOG_MAX_ENTRIES  # Appends since the last trim
+
+
+def _trim_error_log():
+    """Rewrite the error log keeping only the newest ERROR_LOG_MAX_ENTRIES lines"""
+    try:
+        with open(ERROR_LOG_FILE, 'rb') as f:
+            tail = deque(f, maxlen=ERROR_LOG_MAX_ENTRIES)
+    except FileNotFoundError:
+        return
+    atomic_write(ERROR_LOG_FILE, b"".join(tail))
+
+
 def log_error(error_type, message, details=None):
     """Log errors to file with timestamp"""
+    global _error_log_appends
     try:
-        try:
-            with open(ERROR_LOG_FILE, 'r') as f:
-                errors = json.load(f)
-        except:
-            errors = []
-        
         error_entry = {
             "timestamp": datetime.now(IST).isoformat(),
             "type": error_type,
             "message": str(message),
             "details": details
         }
-        errors.append(error_entry)
-        
-        # Keep only last 100 errors
-        errors = errors[-100:]
-        
-        with open(ERROR_LOG_FILE, 'w') as f:
-            json.dump(errors, f, indent=2)
+        with open(ERROR_LOG_FILE, 'ab') as f:
+            f.write(orjson.dumps(error_entry, option=orjson.OPT_APPEND_NEWLINE))
+
+        _error_log_appends += 1
+        if _error_log_appends >= ERROR_LOG_MAX_ENTRIES:
+            _trim_error_log()
+            _error_log_appends = 0
     except Exception as e:
         print(f"Error logging failed: {e}")
 
 
-def parse_timestamp_to_datetime(publish_timestamp):
+# Timestamp formats (compiled once; matched for every scraped line/headline)
+_RE_JUST_NOW = re.compile(r'^Just\s+Now$', re.IGNORECASE)
+_RE_RELATIVE_TS = re.compile(r'^(\d+)\s+(min|mins|hour|hours)\s+ago$')
+_RE_STOCKWATCH_TS = re.compile(
+    r'(\d+)m\s+ago\s*\|\s*(?P<hour>\d{1,2}):(?P<minute>\d{2})\s*(?P<meridiem>[AP]M)'
+    r'\s+(?P<day>\d{2})-(?P<month>\d{2})-(?P<year>\d{4})'
+)
+
+# English month abbreviations, fixed so parsing/formatting never depends on locale
+_MONTH_ABBR = ('', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+               'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+_MONTHS = {name.lower(): number for number, name in enumerate(_MONTH_ABBR) if name}
+
+
+def _is_absolute_ts(s):
+    """Fixed-shape check for "03 Nov 08:26 AM" without running a regex or strptime"""
+    return (len(s) == 15 and s[2] == ' ' and s[6] == ' ' and s[9] == ':' and s[12] == ' '
+            and s[13] in 'AP' and s[14] == 'M' and s[:2].isdigit() and s[3:6].isalpha()
+            and s[7:9].isdigit() and s[10:12].isdigit())
+
+
+def _ist_datetime(year, month, day, hour12, minute, meridiem):
+    """Build an IST datetime from 12-hour clock parts (ValueError if out of range)"""
+    if not 1 <= hour12 <= 12:
+        raise ValueError(f"hour {hour12} is not on a 12-hour clock")
+    hour = hour12 % 12 + (12 if meridiem == 'PM' else 0)
+    return datetime(year, month, day, hour, minute, tzinfo=IST)
+
+
+def format_display_timestamp(dt):
+    """Format as "03 Nov 08:26 AM" (what strftime('%d %b %I:%M %p') gives in the C locale)"""
+    hour12 = dt.hour % 12 or 12
+    meridiem = 'PM' if dt.hour >= 12 else 'AM'
+    return f"{dt.day:02d} {_MONTH_ABBR[dt.month]} {hour12:02d}:{dt.minute:02d} {meridiem}"
+
+
+@lru_cache(maxsize=4096)
+def _parse_absolute_ts(timestamp_str, year):
+    """
+    Parse the clock-independent formats of parse_timestamp_to_datetime.
+    Cached: the same headlines (and so timestamps) come back every check.
+    """
+    # Nuvama "03 Nov 08:26 AM" (given year); the shape check keeps every
+    # other format out, the fields are then sliced
+    absolute = timestamp_str if _is_absolute_ts(timestamp_str) else ' '.join(timestamp_str.split())
+    if _is_absolute_ts(absolute):
+        month = _MONTHS.get(absolute[3:6].lower())
+        if month:
+            try:
+                return _ist_datetime(year, month, int(absolute[:2]),
+                                     int(absolute[7:9]), int(absolute[10:12]), absolute[13:15])
+            except ValueError:
+                pass
+
+    # Stockwatch "4m ago | 07:42 PM 12-02-2026"
+    stockwatch_match = _RE_STOCKWATCH_TS.match(timestamp_str)
+    if stockwatch_match:
+        try:
+            return _ist_datetime(
+                int(stockwatch_match['year']), int(stockwatch_match['month']),
+                int(stockwatch_match['day']), int(stockwatch_match['hour']),
+                int(stockwatch_match['minute']), stockwatch_match['meridiem'],
+            )
+        except ValueError:
+            pass
+
+    return None
+
+
+def parse_timestamp_to_datetime(publish_timestamp, now_ist=None):
     """
     Convert timestamp to IST datetime object for comparison.
     Handles Nuvama: "Just Now", "15 mins ago", "2 hours ago", "03 Nov 08:26 AM"
     Handles Stockwatch: "4m ago | 07:42 PM 12-02-2026"
+    now_ist: reference time for relative formats (defaults to the current time),
+    so a whole check cycle can share one clock reading.
     Returns: datetime object in IST or None if parsing fails
     """
     try:
         timestamp_str = publish_timestamp.strip()
+        if now_ist is None:
+            now_ist = datetime.now(IST)
         
         # Handle "Just Now"
-        if re.match(r'^Just\s+Now$', timestamp_str, re.IGNORECASE):
-            return datetime.now(IST)
+        if _RE_JUST_NOW.match(timestamp_str):
+            return now_ist
         
         # Handle relative timestamps like "15 mins ago" or "2 hours ago"
-        relative_match = re.match(r'^(\d+)\s+(min|mins|hour|hours)\s+ago$', timestamp_str)
+        relative_match = _RE_RELATIVE_TS.match(timestamp_str)
         if relative_match:
             amount = int(relative_match.group(1))
             unit = relative_match.group(2)
-            
-            now_ist = datetime.now(IST)
+
             if unit in ['min', 'mins']:
                 return now_ist - timedelta(minutes=amount)
             else:  # hours
                 return now_ist - timedelta(hours=amount)
         
-        # Handle absolute timestamps like "03 Nov 08:26 AM"
-        try:
-            parsed_time = datetime.strptime(timestamp_str, '%d %b %I:%M %p')
-            current_year = datetime.now(IST).year
-            # Create timezone-aware datetime in IST
-            parsed_time = parsed_time.replace(year=current_year, tzinfo=IST)
-            return parsed_time
-        except:
-            pass
-
-        # Handle Stockwatch format: "4m ago | 07:42 PM 12-02-2026"
-        stockwatch_match = re.match(
-            r'(\d+)m\s+ago\s*\|\s*(\d{1,2}:\d{2}\s*[AP]M)\s+(\d{2}-\d{2}-\d{4})',
-            timestamp_str
-        )
-        if stockwatch_match:
-            time_part = stockwatch_match.group(2).strip()
-            date_part = stockwatch_match.group(3).strip()
-            try:
-                parsed = datetime.strptime(f"{date_part} {time_part}", '%d-%m-%Y %I:%M %p')
-                return parsed.replace(tzinfo=IST)
-            except:
-                pass
-
-        return None
+        # Absolute formats don't depend on the clock, so they are memoized
+        return _parse_absolute_ts(timestamp_str, now_ist.year)
     except Exception as e:
         log_error("timestamp_parse", f"Failed to parse timestamp: {publish_timestamp}", str(e))
         return None
 
 
+TELEGRAM_URL = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
+
+# One keep-alive session so bursts of alerts reuse a single TLS connection
+TELEGRAM_SESSION = requests.Session()
+TELEGRAM_SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+TELEGRAM_SESSION.headers['Content-Type'] = 'application/json'
+
+# sendMessage fields that never change; send_telegram only adds the text and
+# serializes the body once with orjson (reused if a 429 forces a retry)
+TELEGRAM_PAYLOAD_BASE = {
+    "chat_id": CHAT_ID,
+    "parse_mode": "HTML",
+    "disable_web_page_preview": True
+}
+
+_last_telegram_send = 0.0
+
+
+def _wait_for_telegram_slot():
+    """Pace sends to TELEGRAM_MIN_INTERVAL_SECONDS apart, counting request latency"""
+    global _last_telegram_send
+
+    wait = _last_telegram_send + TELEGRAM_MIN_INTERVAL_SECONDS - time.monotonic()
+    if wait > 0:
+        time.sleep(wait)
+    _last_telegram_send = time.monotonic()
+
+
 def send_telegram(headline_text, source="", company=""):
-    """Send one headline to Telegram with source tag and company info"""
+    """
+    Send one headline to Telegram with source tag and company info.
+    Returns True once the alert is handled, so the caller records it in
+    context memory; without credentials only the HTTP send is skipped.
+    """
+    if not TELEGRAM_ENABLED:
+        return True
     try:
         headline_clean = headline_text.strip()
 
@@ -156,16 +314,21 @@ def send_telegram(headline_text, source="", company=""):
             parts.append(f"<b>[{source}]</b>")
 
         message = "\n".join(parts) if len(parts) > 1 else parts[0]
+        body = orjson.dumps({**TELEGRAM_PAYLOAD_BASE, "text": message})
 
-        url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-        response = requests.post(url,
-                                 json={
-                                     "chat_id": CHAT_ID,
-                                     "text": message,
-                                     "parse_mode": "HTML",
-                                     "disable_web_page_preview": True
-                                 },
-                                 timeout=10)
+        for attempt in range(2):
+            _wait_for_telegram_slot()
+            response = TELEGRAM_SESSION.post(TELEGRAM_URL, data=body, timeout=10)
+
+            # Rate limited: honour Telegram's retry_after once, then give up
+            if response.status_code == 429 and attempt == 0:
+                try:
+                    retry_after = response.json().get('parameters', {}).get('retry_after', 1)
+                except ValueError:
+                    retry_after = 1
+                time.sleep(min(float(retry_after), 30))
+                continue
+            break
 
         if response.status_code == 200:
             return True
@@ -178,118 +341,483 @@ def send_telegram(headline_text, source="", company=""):
         return False
 
 
-def scrape_nuvama():
-    """Scrape headlines from Nuvama with timestamps and datetime objects"""
+# ---------- SHARED BROWSER ----------
+
+# Resource types the scrapers never read. Stylesheets stay enabled because
+# inner_text() line breaks depend on CSS layout.
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'font', 'media'})
+
+# Third-party analytics/ads/chat widgets: they never affect the feed but keep
+# the network busy (and delay the networkidle fallback)
+_RE_BLOCKED_HOSTS = re.compile(
+    r'^https?://[^/]*\b(?:google-analytics\.com|googletagmanager\.com|doubleclick\.net'
+    r'|googlesyndication\.com|facebook\.net|hotjar\.com|clarity\.ms|moengage\.com'
+    r'|webengage\.com|clevertap\.com|freshchat\.com)/'
+)
+
+# Chromium flags for a long-lived headless browser in a container: /dev/shm is
+# often tiny (tabs crash once it fills) and there is no GPU to initialise
+CHROMIUM_LAUNCH_ARGS = ['--disable-dev-shm-usage', '--disable-gpu']
+
+# Navigation only waits for DOMContentLoaded; feeds are then awaited by selector
+PAGE_GOTO_TIMEOUT_MS = 30000
+
+_playwright = None
+_browser = None
+_browser_context = None
+
+
+def _block_unused_resources(route):
+    """Playwright route handler: abort requests the scrapers don't need"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or _RE_BLOCKED_HOSTS.match(request.url):
+        route.abort()
+    else:
+        route.continue_()
+
+
+def get_browser_context():
+    """
+    Return the shared browser context, launching Chromium on first use.
+    The browser stays up across checks; each scrape only opens/closes a page.
+    Relaunches automatically if the browser process has died.
+    """
+    global _playwright, _browser, _browser_context
+
+    if _browser_context is not None and _browser.is_connected():
+        return _browser_context
+
+    close_browser()
+    _playwright = sync_playwright().start()
+    _browser = _playwright.chromium.launch(headless=True, args=CHROMIUM_LAUNCH_ARGS)
+    _browser_context = _browser.new_context()
+    _browser_context.route("**/*", _block_unused_resources)
+    return _browser_context
+
+
+def close_browser():
+    """Shut down the shared browser and Playwright driver (safe to call repeatedly)"""
+    global _playwright, _browser, _browser_context
+
+    for shutdown in (
+        _browser_context and _browser_context.close,
+        _browser and _browser.close,
+        _playwright and _playwright.stop,
+    ):
+        if shutdown:
+            try:
+                shutdown()
+            except Exception:
+                pass
+    _playwright = _browser = _browser_context = None
+
+
+atexit.register(close_browser)
+
+
+def wait_for_feed(page, selector, timeout_ms=15000):
+    """
+    Wait until the feed has rendered instead of sleeping a fixed time.
+    On timeout, allow a short network-idle grace period and let the caller
+    parse whatever has rendered so far.
+    """
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
+        page.wait_for_selector(selector, timeout=timeout_ms)
+    except PlaywrightTimeoutError:
+        try:
+            page.wait_for_load_state("networkidle", timeout=3000)
+        except PlaywrightTimeoutError:
+            pass
 
-            print("Loading page...")
-            page.goto(NUVAMA_URL, wait_until="domcontentloaded", timeout=45000)
-            time.sleep(8)
 
-            all_text = page.inner_text("body")
-            browser.close()
+def start_page(url):
+    """
+    Open a page in the shared context and start navigating to url, returning as
+    soon as the server responds; the page keeps loading while other work runs.
+    """
+    page = get_browser_context().new_page()
+    try:
+        page.goto(url, wait_until="commit", timeout=PAGE_GOTO_TIMEOUT_MS)
+    except Exception:
+        page.close()
+        raise
+    return page
 
-            lines = all_text.split('\n')
-            headlines = []
-            
-            # Pattern to match absolute timestamps like "03 Nov 06:35 AM"
-            absolute_timestamp_pattern = r'^\d{2}\s+[A-Za-z]{3}\s+\d{2}:\d{2}\s+[AP]M$'
-            # Pattern to match relative timestamps like "15 mins ago", "1 hour ago"
-            relative_timestamp_pattern = r'^\d+\s+(min|mins|hour|hours)\s+ago$'
-            # Pattern to match "Just Now"
-            just_now_pattern = r'^Just\s+Now$'
-
-            # Navigation/menu items to skip (exact matches only)
-            skip_exact = [
-                'live news', 'all', 'results', 'block deals', 'equity', 
-                'commentary', 'global', 'fixed income', 'commodities', 
-                'solutions', 'markets', 'tools & resources',
-                'support', 'login / sign up', 'search', '0 updates'
-            ]
-            
-            # Generic words that should be filtered
-            skip_patterns = [
-                'sign up', 'get started', 'why nuvama', 'support center', 
-                'helpdesk', 'feedback', 'visit', 'locate', 'healthy financial',
-                'customer', 'trader', 'menu', 'investor charter', 
-                'dispute resolution portal', 'issue with our website',
-                'issue is not resolved', 'join ', 'million customers',
-                'empowering our clients', 'mon-fri', 'all rights reserved',
-                'sebi scores', 'broking services offered by', 'registered office',
-                'corporate office', 'financial products distribution',
-                'most important terms', 'prevent unauthorized', 'healthy financial journey',
-                'switch to old website', 'clicking the button below'
-            ]
-            
-            # Legal patterns
-            legal_patterns = ['broking services offered by', 'registered office', 
-                             'corporate office', 'all rights reserved', 'sebi scores',
-                             'prevent unauthorized', 'financial products distribution',
-                             'most important terms', 'investor charter',
-                             'dispute resolution', 'issue is not resolved',
-                             'empowering our clients', 'dedicated to empowering']
-
-            i = 0
-            while i < len(lines):
-                line_clean = lines[i].strip()
-                
-                # Look for a headline followed by a timestamp
-                if i + 1 < len(lines):
-                    next_line = lines[i + 1].strip()
-                    
-                    # Check if next line is a timestamp (absolute, relative, or "Just Now")
-                    is_absolute_timestamp = re.match(absolute_timestamp_pattern, next_line)
-                    is_relative_timestamp = re.match(relative_timestamp_pattern, next_line)
-                    is_just_now = re.match(just_now_pattern, next_line, re.IGNORECASE)
-                    
-                    if is_absolute_timestamp or is_relative_timestamp or is_just_now:
-                        # This line might be a headline
-                        
-                        # Length filter
-                        if len(line_clean) >= 30 and len(line_clean) <= 1500:
-                            # Skip navigation items
-                            if line_clean.lower() in skip_exact:
-                                i += 1
-                                continue
-                            
-                            # Skip generic patterns
-                            if any(skip_word in line_clean.lower() for skip_word in skip_patterns):
-                                i += 1
-                                continue
-                            
-                            # Skip legal patterns
-                            if any(legal in line_clean.lower() for legal in legal_patterns):
-                                i += 1
-                                continue
-                            
-                            # This looks like a real headline
-                            timestamp_str = next_line
-                            datetime_obj = parse_timestamp_to_datetime(timestamp_str)
-
-                            # Check line after timestamp for category tag (Result, Equity, etc.)
-                            category = ""
-                            if i + 2 < len(lines):
-                                category = lines[i + 2].strip()
-
-                            headlines.append({
-                                'headline': line_clean,
-                                'timestamp': timestamp_str,
-                                'datetime': datetime_obj,  # For comparison
-                                'category': category
-                            })
-                            i += 3  # Skip headline, timestamp, and category
-                            continue
-                
-                i += 1
-            
-            # Don't reverse - Nuvama already shows newest headlines first
-            # Headlines will be processed in order: newest first
-            
-            print(f"Found {len(headlines)} headlines")
+
+# ---------- NUVAMA PAGE FILTERS ----------
+
+# Navigation/menu items to skip (exact matches only)
+NUVAMA_SKIP_EXACT = frozenset({
+    'live news', 'all', 'results', 'block deals', 'equity',
+    'commentary', 'global', 'fixed income', 'commodities',
+    'solutions', 'markets', 'tools & resources',
+    'support', 'login / sign up', 'search', '0 updates'
+})
+
+# Generic words that should be filtered
+NUVAMA_SKIP_PATTERNS = (
+    'sign up', 'get started', 'why nuvama', 'support center',
+    'helpdesk', 'feedback', 'visit', 'locate', 'healthy financial',
+    'customer', 'trader', 'menu', 'investor charter',
+    'dispute resolution portal', 'issue with our website',
+    'issue is not resolved', 'join ', 'million customers',
+    'empowering our clients', 'mon-fri', 'all rights reserved',
+    'sebi scores', 'broking services offered by', 'registered office',
+    'corporate office', 'financial products distribution',
+    'most important terms', 'prevent unauthorized', 'healthy financial journey',
+    'switch to old website', 'clicking the button below'
+)
+
+# Legal patterns
+NUVAMA_LEGAL_PATTERNS = (
+    'broking services offered by', 'registered office',
+    'corporate office', 'all rights reserved', 'sebi scores',
+    'prevent unauthorized', 'financial products distribution',
+    'most important terms', 'investor charter',
+    'dispute resolution', 'issue is not resolved',
+    'empowering our clients', 'dedicated to empowering'
+)
+
+# A headline line immediately followed by a timestamp line: "03 Nov 06:35 AM",
+# "15 mins ago", "1 hour ago" or "Just Now". [^\S\n] is whitespace within a line.
+_RE_NUVAMA_ITEM = re.compile(
+    r'^(?P<headline>[^\n]*)\n'
+    r'[^\S\n]*(?P<timestamp>'
+    r'\d{2}[^\S\n]+[A-Za-z]{3}[^\S\n]+\d{2}:\d{2}[^\S\n]+[AP]M'
+    r'|\d+[^\S\n]+(?:min|mins|hour|hours)[^\S\n]+ago'
+    r'|(?i:Just[^\S\n]+Now)'
+    r')[^\S\n]*$',
+    re.MULTILINE
+)
+
+# Any element whose text is a headline timestamp means the feed has rendered
+NUVAMA_READY_SELECTOR = (
+    r"text=/\d{2}\s+[A-Za-z]{3}\s+\d{2}:\d{2}\s+[AP]M|\d+\s+(min|mins|hour|hours)\s+ago|Just\s+Now/i"
+)
+
+# Runs in the page: takes the innerText of <main> (or the whole body when
+# useMain is false or there is no <main>) and returns only the lines around
+# each timestamp line - headline, timestamp, category - so the rest of the
+# page text is never sent over the Playwright connection. The timestamp test
+# is a case-insensitive superset of _RE_NUVAMA_ITEM's, which re-checks it;
+# lines outside parse_nuvama_text's headline length bounds are dropped here.
+NUVAMA_TEXT_SCRIPT = r"""(useMain) => {
+    const root = (useMain && document.querySelector('main')) || document.body;
+    const lines = root.innerText.split('\n');
+    const ts = /^\s*(\d{2}\s+[A-Za-z]{3}\s+\d{2}:\d{2}\s+[AP]M|\d+\s+(min|mins|hour|hours)\s+ago|Just\s+Now)\s*$/i;
+    const out = [];
+    for (let i = 1; i < lines.length; i++) {
+        const length = lines[i - 1].trim().length;
+        if (length >= 30 && length <= 1500 && ts.test(lines[i])) {
+            out.push(lines[i - 1], lines[i], i + 1 < lines.length ? lines[i + 1] : '');
+        }
+    }
+    return out.join('\n');
+}"""
+
+def _literal_trie_pattern(words):
+    """
+    Regex source matching any of words, with shared prefixes factored into a
+    trie ("s(?:ebi scores|upport center)") so the engine tries each distinct
+    prefix once per position instead of every phrase in turn.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = None  # end of a word
+
+    def build(node):
+        alternatives = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alternatives:
+            return ''
+        pattern = alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+        return f'(?:{pattern})?' if '' in node else pattern
+
+    return build(trie)
+
+
+# All skip/legal phrases as one prefix-factored alternation: a single scan per
+# line instead of one substring search per phrase
+_RE_NUVAMA_SKIP = re.compile(_literal_trie_pattern(NUVAMA_SKIP_PATTERNS + NUVAMA_LEGAL_PATTERNS))
+
+
+def parse_nuvama_text(all_text, now_ist=None):
+    """
+    Extract headlines from the rendered text of the Nuvama live-news page.
+    Headlines are a line followed by a timestamp line and an optional category line.
+    """
+    headlines = []
+
+    # One regex pass over the whole text finds every (line, timestamp line) pair
+    for match in _RE_NUVAMA_ITEM.finditer(all_text):
+        line_clean = match.group('headline').strip()
+
+        # Length filter
+        if len(line_clean) < 30 or len(line_clean) > 1500:
+            continue
+
+        line_lower = line_clean.lower()
+
+        # Skip navigation items
+        if line_lower in NUVAMA_SKIP_EXACT:
+            continue
+
+        # Skip generic and legal patterns
+        if _RE_NUVAMA_SKIP.search(line_lower):
+            continue
+
+        # This looks like a real headline
+        timestamp_str = match.group('timestamp')
+        datetime_obj = parse_timestamp_to_datetime(timestamp_str, now_ist)
+
+        # Check line after timestamp for category tag (Result, Equity, etc.)
+        category = ""
+        category_start = match.end() + 1
+        if category_start <= len(all_text):
+            category_end = all_text.find('\n', category_start)
+            category = all_text[category_start:category_end if category_end != -1 else None].strip()
+
+        headlines.append({
+            'headline': line_clean,
+            'timestamp': timestamp_str,
+            'datetime': datetime_obj,  # For comparison
+            'category': category
+        })
+
+    # Don't reverse - Nuvama already shows newest headlines first
+    # Headlines will be processed in order: newest first
+    return headlines
+
+
+_nuvama_text_digest = None  # Digest of the last page text that had headlines
+_nuvama_text_headlines = []
+
+
+def parse_nuvama_text_cached(all_text, now_ist=None):
+    """
+    parse_nuvama_text, skipped when the page text is byte-for-byte the same as
+    last time (nothing new was posted); returns the previous result instead.
+    """
+    global _nuvama_text_digest, _nuvama_text_headlines
+
+    digest = hashlib.blake2b(all_text.encode('utf-8'), digest_size=16).digest()
+    if digest == _nuvama_text_digest:
+        return _nuvama_text_headlines
+
+    headlines = parse_nuvama_text(all_text, now_ist)
+    if headlines:
+        _nuvama_text_digest = digest
+        _nuvama_text_headlines = headlines
+    return headlines
+
+
+class _PageTextExtractor(HTMLParser):
+    """Approximate inner_text("body"): one line per block element, no script/style"""
+
+    BLOCK_TAGS = frozenset({
+        'address', 'article', 'aside', 'br', 'dd', 'div', 'dl', 'dt', 'footer',
+        'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav',
+        'ol', 'p', 'section', 'table', 'td', 'th', 'tr', 'ul',
+    })
+    HIDDEN_TAGS = frozenset({'script', 'style', 'noscript', 'template'})
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._hidden_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.HIDDEN_TAGS:
+            self._hidden_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in self.HIDDEN_TAGS:
+            self._hidden_depth = max(0, self._hidden_depth - 1)
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if not self._hidden_depth:
+            self.parts.append(data)
+
+    def text(self):
+        lines = (line.strip() for line in ''.join(self.parts).split('\n'))
+        return '\n'.join(line for line in lines if line)
+
+
+# Keep-alive session plus the validators/result of the last 200 response, so
+# an unchanged page costs a 304 instead of a download and parse
+NUVAMA_HTTP_SESSION = requests.Session()
+NUVAMA_HTTP_SESSION.headers['User-Agent'] = HTTP_USER_AGENT
+_nuvama_http_validators = {}
+_nuvama_http_headlines = None
+
+
+def fetch_nuvama_http(now_ist=None):
+    """
+    Fast path: fetch the Nuvama page over plain HTTP and parse server-rendered text.
+    Sends If-None-Match/If-Modified-Since and reuses the last result on 304.
+    Returns None when the response has no recognizable headlines (e.g. the feed
+    is rendered client-side), so the caller can fall back to the browser.
+    """
+    global _nuvama_http_validators, _nuvama_http_headlines
+
+    try:
+        headers = _nuvama_http_validators if _nuvama_http_headlines else {}
+        response = NUVAMA_HTTP_SESSION.get(NUVAMA_URL, headers=headers, timeout=15)
+        if response.status_code == 304 and _nuvama_http_headlines:
+            return _nuvama_http_headlines
+        if response.status_code != 200:
+            return None
+
+        extractor = _PageTextExtractor()
+        extractor.feed(response.text)
+        extractor.close()
+
+        headlines = parse_nuvama_text_cached(extractor.text(), now_ist)
+
+        _nuvama_http_validators = {}
+        if response.headers.get('ETag'):
+            _nuvama_http_validators['If-None-Match'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            _nuvama_http_validators['If-Modified-Since'] = response.headers['Last-Modified']
+        _nuvama_http_headlines = headlines or None
+        return _nuvama_http_headlines
+    except Exception as e:
+        log_error("scraping_http", str(e), NUVAMA_URL)
+        return None
+
+
+# Field names tried, in order, on each item of the Nuvama JSON feed
+NUVAMA_API_HEADLINE_KEYS = ('headline', 'title', 'newsTitle', 'heading')
+NUVAMA_API_TIME_KEYS = ('time', 'publishedAt', 'publishTime', 'date', 'createdAt', 'timestamp')
+NUVAMA_API_CATEGORY_KEYS = ('category', 'tag', 'type')
+
+
+def _first_field(item, keys):
+    """Value of the first key present and non-empty in item, else None"""
+    for key in keys:
+        value = item.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _find_item_list(data):
+    """First list of objects in a JSON response, searched breadth-first"""
+    queue = deque([data])
+    while queue:
+        node = queue.popleft()
+        if isinstance(node, list):
+            if node and isinstance(node[0], dict):
+                return node
+            queue.extend(node)
+        elif isinstance(node, dict):
+            queue.extend(node.values())
+    return []
+
+
+def _api_time_to_datetime(value):
+    """IST datetime from an ISO 8601 or epoch (s/ms) API time field, else None"""
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value / 1000 if value > 1e11 else value, IST)
+        dt = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    except (OverflowError, OSError, ValueError, TypeError):
+        return None  # Malformed or out-of-range time
+    return dt.replace(tzinfo=IST) if dt.tzinfo is None else dt.astimezone(IST)
+
+
+def fetch_nuvama_api(now_ist=None):
+    """
+    Read headlines straight from the Nuvama JSON feed at NUVAMA_API_URL.
+    Items are mapped through the *_KEYS field names above, so no page text is
+    parsed. Returns None on failure or an empty feed so the caller falls back.
+    """
+    try:
+        response = NUVAMA_HTTP_SESSION.get(
+            NUVAMA_API_URL, headers={'Accept': 'application/json'}, timeout=10
+        )
+        if response.status_code != 200:
+            return None
+        items = _find_item_list(orjson.loads(response.content))
+    except Exception as e:
+        log_error("scraping_api", str(e), NUVAMA_API_URL)
+        return None
+
+    headlines = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        headline = _first_field(item, NUVAMA_API_HEADLINE_KEYS)
+        raw_time = _first_field(item, NUVAMA_API_TIME_KEYS)
+        if not isinstance(headline, str) or raw_time is None:
+            continue
+        headline = ' '.join(headline.split())
+        if len(headline) < 30 or len(headline) > 1500:
+            continue
+
+        # Page-style times ("15 mins ago") are kept as shown; others are reformatted
+        datetime_obj = None
+        if isinstance(raw_time, str):
+            datetime_obj = parse_timestamp_to_datetime(raw_time, now_ist)
+        if datetime_obj is not None:
+            timestamp_str = raw_time.strip()
+        else:
+            datetime_obj = _api_time_to_datetime(raw_time)
+            if datetime_obj is None:
+                continue
+            timestamp_str = format_display_timestamp(datetime_obj)
+
+        headlines.append({
+            'headline': headline,
+            'timestamp': timestamp_str,
+            'datetime': datetime_obj,
+            'category': str(_first_field(item, NUVAMA_API_CATEGORY_KEYS) or '')
+        })
+    return headlines or None
+
+
+def scrape_nuvama(now_ist=None):
+    """Scrape headlines from Nuvama with timestamps and datetime objects"""
+    if NUVAMA_API_URL:
+        try:
+            headlines = fetch_nuvama_api(now_ist)
+        except Exception as e:
+            log_error("scraping_api", str(e), NUVAMA_API_URL)
+            headlines = None
+        if headlines is not None:
+            print(f"Found {len(headlines)} headlines (API)")
             return headlines
+        print("API fetch found no headlines, falling back")
+
+    if NUVAMA_HTTP_FETCH:
+        headlines = fetch_nuvama_http(now_ist)
+        if headlines is not None:
+            print(f"Found {len(headlines)} headlines (HTTP)")
+            return headlines
+        print("HTTP fetch found no headlines, falling back to browser")
+
+    try:
+        page = get_browser_context().new_page()
+        try:
+            print("Loading page...")
+            page.goto(NUVAMA_URL, wait_until="domcontentloaded", timeout=PAGE_GOTO_TIMEOUT_MS)
+            wait_for_feed(page, NUVAMA_READY_SELECTOR)
+
+            headlines = parse_nuvama_text_cached(page.evaluate(NUVAMA_TEXT_SCRIPT, True), now_ist)
+            if not headlines:
+                # The feed may live outside <main>; retry with the whole page
+                headlines = parse_nuvama_text_cached(page.evaluate(NUVAMA_TEXT_SCRIPT, False), now_ist)
+        finally:
+            page.close()
+
+        print(f"Found {len(headlines)} headlines")
+        return headlines
 
     except Exception as e:
         log_error("scraping", str(e), NUVAMA_URL)
@@ -297,42 +825,58 @@ def scrape_nuvama():
         return []
 
 
-def scrape_stockwatch():
-    """Scrape headlines from Stockwatch.live dashboard"""
-    try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
+# Stockwatch renders headlines as <a> tags with URL params containing newsId
+STOCKWATCH_LINK_SELECTOR = 'a[href*="newsId"]'
+
+# Runs in the page: reads every headline link's query params and <h6>
+# timestamp in one round trip instead of several sync calls per link.
+# Values come back decoded once by URLSearchParams (as with parse_qs).
+STOCKWATCH_LINKS_SCRIPT = r"""(selector) => Array.from(document.querySelectorAll(selector)).flatMap((a) => {
+    let params;
+    try {
+        params = new URL(a.getAttribute('href') || '', location.href).searchParams;
+    } catch (e) {
+        return [];  // Malformed href: skip just this link
+    }
+    const h6 = a.querySelector('h6');
+    return [{
+        name: params.get('name') || '',
+        title: params.get('title') || '',
+        newsId: params.get('newsId') || '',
+        timestamp: h6 ? h6.innerText : ''
+    }];
+})"""
+
 
+def scrape_stockwatch(now_ist=None, page=None):
+    """
+    Scrape headlines from Stockwatch.live dashboard.
+    page: a page already started on STOCKWATCH_URL via start_page (closed here)
+    """
+    try:
+        if page is None:
+            page = start_page(STOCKWATCH_URL)
+        try:
             print("Loading Stockwatch...")
-            page.goto(STOCKWATCH_URL, wait_until="domcontentloaded", timeout=45000)
-            time.sleep(8)
+            page.wait_for_load_state("domcontentloaded", timeout=PAGE_GOTO_TIMEOUT_MS)
+            wait_for_feed(page, STOCKWATCH_LINK_SELECTOR)
 
             headlines = []
 
-            # Stockwatch renders headlines as <a> tags with URL params containing newsId
-            links = page.query_selector_all('a[href*="newsId"]')
+            links = page.evaluate(STOCKWATCH_LINKS_SCRIPT, STOCKWATCH_LINK_SELECTOR)
 
             for link in links:
                 try:
-                    href = link.get_attribute('href') or ''
-
-                    # Parse URL parameters
-                    parsed = urlparse(href)
-                    params = parse_qs(parsed.query)
-
-                    company = unquote(params.get('name', [''])[0]).strip()
-                    title = unquote(params.get('title', [''])[0]).strip()
-                    news_id = params.get('newsId', [''])[0].strip()
+                    company = unquote(link['name']).strip()
+                    title = unquote(link['title']).strip()
+                    news_id = link['newsId'].strip()
 
                     if not title or len(title) < 15:
                         continue
 
-                    # Extract timestamp from <h6> element inside the link
-                    h6 = link.query_selector('h6')
-                    timestamp_str = h6.inner_text().strip() if h6 else ''
+                    timestamp_str = link['timestamp'].strip()
 
-                    datetime_obj = parse_timestamp_to_datetime(timestamp_str) if timestamp_str else None
+                    datetime_obj = parse_timestamp_to_datetime(timestamp_str, now_ist) if timestamp_str else None
 
                     headlines.append({
                         'headline': title,
@@ -345,10 +889,11 @@ def scrape_stockwatch():
                     })
                 except Exception:
                     continue
+        finally:
+            page.close()
 
-            browser.close()
-            print(f"Found {len(headlines)} Stockwatch headlines")
-            return headlines
+        print(f"Found {len(headlines)} Stockwatch headlines")
+        return headlines
 
     except Exception as e:
         log_error("scraping_stockwatch", str(e), STOCKWATCH_URL)
@@ -356,30 +901,51 @@ def scrape_stockwatch():
         return []
 
 
-def get_all_headlines():
+def get_all_headlines(now_ist=None):
     """Fetch and combine headlines from all sources into standardized format"""
+    if now_ist is None:
+        now_ist = datetime.now(IST)
     all_headlines = []
 
-    # Scrape Nuvama (returns old format: {headline, timestamp, datetime, category})
-    nuvama_raw = scrape_nuvama()
-    for h in nuvama_raw:
-        all_headlines.append({
-            'headline': h['headline'],
-            'timestamp': h['timestamp'],
-            'datetime': h['datetime'],
-            'category': h.get('category', ''),
-            'source': 'NUVAMA',
-            'company': '',
-            'news_id': ''
-        })
-
-    # Scrape Stockwatch (already returns standardized format)
-    stockwatch_raw = []
+    # Start Stockwatch loading first so it renders in the shared browser while
+    # Nuvama is scraped; the cycle then takes about the longer of the two
+    stockwatch_page = None
     if ENABLE_STOCKWATCH:
-        stockwatch_raw = scrape_stockwatch()
-        all_headlines.extend(stockwatch_raw)
-    else:
-        print("Stockwatch feed disabled")
+        try:
+            stockwatch_page = start_page(STOCKWATCH_URL)
+        except Exception as e:
+            log_error("scraping_stockwatch", str(e), STOCKWATCH_URL)
+
+    try:
+        # Scrape Nuvama (returns old format: {headline, timestamp, datetime, category})
+        nuvama_raw = scrape_nuvama(now_ist)
+        for h in nuvama_raw:
+            all_headlines.append({
+                'headline': h['headline'],
+                'timestamp': h['timestamp'],
+                'datetime': h['datetime'],
+                'category': h.get('category', ''),
+                'source': 'NUVAMA',
+                'company': '',
+                'news_id': ''
+            })
+
+        # Scrape Stockwatch (already returns standardized format)
+        stockwatch_raw = []
+        if ENABLE_STOCKWATCH:
+            # scrape_stockwatch closes the page from here on
+            page, stockwatch_page = stockwatch_page, None
+            stockwatch_raw = scrape_stockwatch(now_ist, page)
+            all_headlines.extend(stockwatch_raw)
+        else:
+            print("Stockwatch feed disabled")
+    finally:
+        # Don't leak the pre-started page if the Nuvama scrape raised
+        if stockwatch_page is not None:
+            try:
+                stockwatch_page.close()
+            except Exception:
+                pass
 
     # Sort combined list by datetime descending (newest first)
     all_headlines.sort(
@@ -407,13 +973,18 @@ def _strip_suffixes(name):
     return lower
 
 
+_RE_WHITESPACE = re.compile(r'\s+')
+
+
+# Remove dots, apostrophes, and normalize ampersands (varies between sources)
+_COMPANY_PUNCT_TABLE = str.maketrans({'.': None, "'": None, '&': ' and '})
+
+
+@lru_cache(maxsize=4096)
 def _normalize_company(name):
     """Normalize company name for matching: strip suffixes, remove punctuation, lowercase."""
-    lower = _strip_suffixes(name).lower()
-    # Remove dots, apostrophes, and normalize ampersands (varies between sources)
-    lower = lower.replace('.', '').replace("'", '').replace('&', ' and ')
-    lower = re.sub(r'\s+', ' ', lower).strip()
-    return lower
+    lower = _strip_suffixes(name).lower().translate(_COMPANY_PUNCT_TABLE)
+    return _RE_WHITESPACE.sub(' ', lower).strip()
 
 
 def _load_companies_from_csv(csv_path, companies, aliases):
@@ -466,7 +1037,7 @@ def load_nifty500_companies():
     Auto-generates aliases from company names and symbols.
     Supports NSE CSV format: Company Name, Industry, Symbol, Series, ISIN Code
     Just drop a new CSV to update — no code changes needed.
-    Returns (set_of_names, dict_of_aliases).
+    Returns (frozenset_of_names, dict_of_aliases).
     Uses EXACT matching only — no substring matching to avoid false positives.
     """
     global _nifty500_companies, _nifty500_aliases
@@ -500,9 +1071,9 @@ def load_nifty500_companies():
 
     print(f"Total company filter: {len(companies)} identifiers")
 
-    _nifty500_companies = companies
+    _nifty500_companies = frozenset(companies)
     _nifty500_aliases = aliases
-    return companies, aliases
+    return _nifty500_companies, aliases
 
 
 def is_nifty500_match(company_name, headline_text=""):
@@ -532,103 +1103,297 @@ def is_nifty500_match(company_name, headline_text=""):
     return False
 
 
+_seen_db = None
+_seen_ids = None  # {id: unix time last marked}, only the last SEEN_MEMORY_HOURS
+_seen_has_md5_ids = False  # Store still contains pre-BLAKE2b (16-byte MD5) IDs
+_seen_last_prune = 0.0
+_seen_pending = []  # (id, ts) rows marked since the last save_seen
+
+
+def _get_seen_db():
+    """Open the SQLite seen-ID store, importing the legacy JSON history once"""
+    global _seen_db
+
+    if _seen_db is not None:
+        return _seen_db
+
+    conn = sqlite3.connect(HISTORY_FILE)
+    conn.execute("CREATE TABLE IF NOT EXISTS seen (h BLOB PRIMARY KEY, ts INTEGER NOT NULL)")
+    conn.execute("CREATE INDEX IF NOT EXISTS seen_ts ON seen (ts)")
+
+    if not conn.execute("SELECT 1 FROM seen LIMIT 1").fetchone():
+        try:
+            with open(LEGACY_HISTORY_FILE, 'rb') as f:
+                data = orjson.loads(f.read())
+            if isinstance(data, list):
+                now = int(time.time())
+                conn.executemany(
+                    "INSERT OR IGNORE INTO seen (h, ts) VALUES (?, ?)",
+                    ((bytes.fromhex(h_id), now) for h_id in data if isinstance(h_id, str))
+                )
+                print(f"Migrated {len(data)} seen IDs to {HISTORY_FILE}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log_error("seen_migrate", str(e), LEGACY_HISTORY_FILE)
+            print(f"Seen IDs migration error: {e}")
+    conn.commit()
+
+    _seen_db = conn
+    return conn
+
+
 def load_seen():
-    """Load seen headlines with validation"""
+    """
+    Load IDs seen within the in-memory window (older ones stay on disk).
+    Read from the store once per process; later calls return the same live dict.
+    """
+    global _seen_ids, _seen_has_md5_ids
+
+    if _seen_ids is not None:
+        return _seen_ids
+
     try:
-        with open(HISTORY_FILE, 'r') as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                return set(data)
-            return set()
-    except:
-        return set()
+        db = _get_seen_db()
+        cutoff = int(time.time()) - SEEN_MEMORY_HOURS * 3600
+        _seen_has_md5_ids = db.execute(
+            "SELECT 1 FROM seen WHERE length(h) = 16 LIMIT 1"
+        ).fetchone() is not None
+        _seen_ids = dict(db.execute("SELECT h, ts FROM seen WHERE ts >= ?", (cutoff,)))
+        return _seen_ids
+    except Exception as e:
+        log_error("load_seen", str(e), HISTORY_FILE)
+        print(f"Load seen error: {e}")
+        return {}
+
+
+def headline_id(headline_normalized):
+    """Exact-dedup key: 8-byte BLAKE2b digest of the normalized headline"""
+    return hashlib.blake2b(headline_normalized.encode(), digest_size=8).digest()
+
+
+def _seen_on_disk(h_id):
+    """Primary-key lookup for IDs that have aged out of the in-memory window"""
+    return _get_seen_db().execute("SELECT 1 FROM seen WHERE h = ?", (h_id,)).fetchone() is not None
+
+
+def is_seen(seen_ids, headline_normalized, h_id):
+    """Check an ID against seen IDs, also accepting legacy MD5 IDs during migration"""
+    if h_id in seen_ids or _seen_on_disk(h_id):
+        return True
+    if _seen_has_md5_ids:
+        legacy_id = hashlib.md5(headline_normalized.encode()).digest()
+        return legacy_id in seen_ids or _seen_on_disk(legacy_id)
+    return False
+
+
+def mark_seen(seen_ids, h_id):
+    """Record an ID in memory and queue it for the store (written by save_seen)"""
+    if h_id in seen_ids:
+        return
+    now = int(time.time())
+    seen_ids[h_id] = now
+    _seen_pending.append((h_id, now))
 
 
 def save_seen(seen_ids):
-    """Save seen headlines"""
+    """
+    Write the cycle's newly seen IDs in one statement and, at most hourly, drop
+    IDs past retention from the store and IDs past the memory window from
+    memory (they stay on disk)
+    """
+    global _seen_last_prune
+
     try:
-        with open(HISTORY_FILE, 'w') as f:
-            json.dump(list(seen_ids), f, indent=2)
+        db = _get_seen_db()
+        if _seen_pending:
+            db.executemany("INSERT OR REPLACE INTO seen (h, ts) VALUES (?, ?)", _seen_pending)
+            _seen_pending.clear()
+        now = time.time()
+        if now - _seen_last_prune >= 3600:
+            db.execute("DELETE FROM seen WHERE ts < ?", (int(now) - SEEN_RETENTION_DAYS * 86400,))
+            memory_cutoff = int(now) - SEEN_MEMORY_HOURS * 3600
+            for h_id in [h_id for h_id, ts in seen_ids.items() if ts < memory_cutoff]:
+                del seen_ids[h_id]
+            _seen_last_prune = now
+        db.commit()
     except Exception as e:
         log_error("save_seen", str(e), f"Seen IDs count: {len(seen_ids)}")
         print(f"Save error: {e}")
 
 
+_last_check = None
+_last_check_loaded = False
+
+
 def load_last_check_timestamp():
-    """Load last successful check timestamp"""
+    """Load last successful check timestamp (read from disk once, then cached)"""
+    global _last_check, _last_check_loaded
+
+    if _last_check_loaded:
+        return _last_check
+
     try:
-        with open(LAST_CHECK_FILE, 'r') as f:
-            data = json.load(f)
+        with open(LAST_CHECK_FILE, 'rb') as f:
+            data = orjson.loads(f.read())
             timestamp_str = data.get('last_check')
             if timestamp_str:
-                return datetime.fromisoformat(timestamp_str)
-        return None
+                _last_check = datetime.fromisoformat(timestamp_str)
     except:
-        return None
+        pass
+    _last_check_loaded = True
+    return _last_check
 
 
 def save_last_check_timestamp():
     """Save current timestamp as last successful check"""
+    global _last_check, _last_check_loaded
+
     try:
+        now_ist = datetime.now(IST)
+        _last_check = now_ist
+        _last_check_loaded = True
         data = {
-            'last_check': datetime.now(IST).isoformat(),
-            'last_check_readable': datetime.now(IST).strftime('%d %b %Y %I:%M:%S %p IST')
+            'last_check': now_ist.isoformat(),
+            'last_check_readable': now_ist.strftime('%d %b %Y %I:%M:%S %p IST')
         }
-        with open(LAST_CHECK_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
+        atomic_write(LAST_CHECK_FILE, orjson.dumps(data, option=orjson.OPT_INDENT_2))
     except Exception as e:
         log_error("save_last_check", str(e), None)
         print(f"Failed to save last check timestamp: {e}")
 
 
+_headlines_db_lines = None  # Lines in HEADLINES_DB_FILE, counted lazily
+_headline_listeners = []  # Callbacks run with each entry saved to the database
+
+
+def add_headline_listener(callback):
+    """Register callback(entry) to run after each headline is saved"""
+    _headline_listeners.append(callback)
+
+
 def load_headlines_db():
-    """Load headlines database with validation"""
+    """Load the newest headlines from the NDJSON database (newest first)"""
     try:
-        with open(HEADLINES_DB_FILE, 'r') as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                return data
-            return []
+        with open(HEADLINES_DB_FILE, 'rb') as f:
+            tail = deque(f, maxlen=HEADLINES_DB_MAX_ENTRIES)
     except:
         return []
 
+    db = []
+    for line in reversed(tail):
+        try:
+            entry = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            continue  # Blank or torn line from an interrupted append
+        if isinstance(entry, dict):
+            db.append(entry)
+    return db
+
+
+def _write_headlines_db(db):
+    """Rewrite the NDJSON database from a newest-first list of entries"""
+    global _headlines_db_lines
+
+    db = db[:HEADLINES_DB_MAX_ENTRIES]
+    atomic_write(HEADLINES_DB_FILE, b"".join(
+        orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE) for entry in reversed(db)
+    ))
+    _headlines_db_lines = len(db)
+
 
-def save_headline_to_db(headline_text, publish_timestamp, source="", company=""):
-    """Save a headline to the database with actual publish timestamp in IST"""
+def _count_headlines_db_lines():
+    """Count lines currently in the NDJSON database (once per process)"""
     try:
-        db = load_headlines_db()
+        with open(HEADLINES_DB_FILE, 'rb') as f:
+            return sum(1 for _ in f)
+    except FileNotFoundError:
+        return 0
+
+
+def migrate_legacy_headlines_db():
+    """One-time conversion of the old JSON-array database to NDJSON"""
+    if os.path.exists(HEADLINES_DB_FILE) or not os.path.exists(LEGACY_HEADLINES_DB_FILE):
+        return
+    try:
+        with open(LEGACY_HEADLINES_DB_FILE, 'rb') as f:
+            data = orjson.loads(f.read())
+        if isinstance(data, list):
+            _write_headlines_db([e for e in data if isinstance(e, dict)])
+            print(f"Migrated {min(len(data), HEADLINES_DB_MAX_ENTRIES)} headlines to {HEADLINES_DB_FILE}")
+    except Exception as e:
+        log_error("database_migrate", str(e), LEGACY_HEADLINES_DB_FILE)
+        print(f"Database migration error: {e}")
 
-        datetime_obj = parse_timestamp_to_datetime(publish_timestamp)
-        if datetime_obj:
-            formatted_timestamp = datetime_obj.strftime('%d %b %I:%M %p')
-            formatted_date = datetime_obj.strftime('%Y-%m-%d')
+
+def build_headline_entry(headline_text, publish_timestamp, source="", company="", now_ist=None,
+                         datetime_obj=None):
+    """
+    Build a database entry with the actual publish timestamp in IST.
+    Pass datetime_obj when the scraper already parsed publish_timestamp.
+    """
+    if now_ist is None:
+        now_ist = datetime.now(IST)
+    if datetime_obj is None:
+        datetime_obj = parse_timestamp_to_datetime(publish_timestamp, now_ist)
+    if datetime_obj:
+        formatted_timestamp = format_display_timestamp(datetime_obj)
+        formatted_date = datetime_obj.date().isoformat()
+    else:
+        # Fallback: if timestamp text is too long, it's not a real timestamp
+        if len(publish_timestamp) > 50:
+            formatted_timestamp = format_display_timestamp(now_ist)
         else:
-            # Fallback: if timestamp text is too long, it's not a real timestamp
-            if len(publish_timestamp) > 50:
-                formatted_timestamp = datetime.now(IST).strftime('%d %b %I:%M %p')
-            else:
-                formatted_timestamp = publish_timestamp
-            formatted_date = datetime.now(IST).strftime('%Y-%m-%d')
-
-        entry = {
-            "headline": headline_text,
-            "timestamp": formatted_timestamp,
-            "date": formatted_date,
-            "source": source,
-            "company": company
-        }
+            formatted_timestamp = publish_timestamp
+        formatted_date = now_ist.date().isoformat()
+
+    return {
+        "headline": headline_text,
+        "timestamp": formatted_timestamp,
+        "date": formatted_date,
+        "source": source,
+        "company": company
+    }
+
 
-        # Always insert at position 0 (newest first)
-        # This ensures new headlines always appear at the top of the dashboard
-        db.insert(0, entry)
+def save_headlines_to_db(entries):
+    """Append entries (oldest first) to the database in a single write"""
+    global _headlines_db_lines
 
-        # Keep only last 100 headlines
-        db = db[:100]
-        with open(HEADLINES_DB_FILE, 'w') as f:
-            json.dump(db, f, indent=2)
+    if not entries:
+        return
+    try:
+        if _headlines_db_lines is None:
+            _headlines_db_lines = _count_headlines_db_lines()
+
+        # Append lines (newest last on disk); readers reverse the tail so
+        # new headlines still appear at the top of the dashboard
+        with open(HEADLINES_DB_FILE, 'ab') as f:
+            f.write(b"".join(orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE) for entry in entries))
+        _headlines_db_lines += len(entries)
+
+        # Notify as soon as the entries are on disk, before compaction can fail
+        for entry in entries:
+            for callback in _headline_listeners:
+                callback(entry)
+
+        # Compact occasionally instead of rewriting the file on every insert
+        if _headlines_db_lines > 2 * HEADLINES_DB_MAX_ENTRIES:
+            _write_headlines_db(load_headlines_db())
+    except Exception as e:
+        log_error("database_save", str(e), f"{len(entries)} entries")
+        print(f"Database save error: {e}")
+
+
+def save_headline_to_db(headline_text, publish_timestamp, source="", company="", now_ist=None):
+    """Append a headline to the database with actual publish timestamp in IST"""
+    try:
+        entry = build_headline_entry(headline_text, publish_timestamp, source, company, now_ist)
     except Exception as e:
         log_error("database_save", str(e), headline_text[:100])
         print(f"Database save error: {e}")
+        return
+    save_headlines_to_db([entry])
 
 
 def cleanup_database():
@@ -668,8 +1433,7 @@ def cleanup_database():
             cleaned.append(entry)
 
         if removed > 0:
-            with open(HEADLINES_DB_FILE, 'w') as f:
-                json.dump(cleaned, f, indent=2)
+            _write_headlines_db(cleaned)
             print(f"Database cleanup: removed {removed} entries (duplicates/non-Nifty500)")
         else:
             print("Database cleanup: no entries to remove")
@@ -678,6 +1442,32 @@ def cleanup_database():
         print(f"Database cleanup error: {e}")
 
 
+_RE_QUARTER = re.compile(r'\bq[1-4]\b')
+
+# Direct financial results patterns (without Q1-Q4 prefix), as one alternation
+_RE_RESULTS = re.compile('|'.join((
+    r'\bnet profit\b.*\brupees\b',
+    r'\bnet loss\b.*\brupees\b',
+    r'\brevenue\b.*\brupees\b.*\byoy\b',
+    r'\bebitda\b.*\brupees\b.*\byoy\b',
+    r'\bsl net profit\b',
+    r'\bcons net profit\b',
+    r'\bsl net loss\b',
+    r'\bcons net loss\b',
+)))
+
+# Every quarterly or direct results match contains one of these substrings,
+# so a headline with none of them can be rejected without running any regex.
+_RESULTS_HINTS = ('q1', 'q2', 'q3', 'q4', 'profit', 'loss', 'revenue', 'ebitda')
+
+_EARNINGS_KEYWORDS = (
+    'net profit', 'net loss', 'revenue', 'ebitda', 'ebitda margin',
+    'rupees vs', 'rupees vs.', 'yoy', 'qoq', 'est ',
+    'margin', 'topline', 'bottomline', 'bottom line', 'top line',
+    'profit after tax', 'pat ', 'sales ',
+)
+
+
 def is_results_headline(headline_text, category=""):
     """
     Detect if a headline is a results/earnings headline.
@@ -692,35 +1482,20 @@ def is_results_headline(headline_text, category=""):
 
     # Content-based detection: look for earnings/results patterns in headline text
     text_lower = headline_text.lower()
+    if not any(h in text_lower for h in _RESULTS_HINTS):
+        return False
 
     # Quarterly results pattern: "Q3 Net Profit", "Q2 Revenue", "Q1 EBITDA", etc.
-    if re.search(r'\bq[1-4]\b', text_lower):
+    if _RE_QUARTER.search(text_lower):
         # Confirm it's actually an earnings headline (not just mentioning Q1-Q4 casually)
-        earnings_keywords = [
-            'net profit', 'net loss', 'revenue', 'ebitda', 'ebitda margin',
-            'rupees vs', 'rupees vs.', 'yoy', 'qoq', 'est ',
-            'margin', 'topline', 'bottomline', 'bottom line', 'top line',
-            'profit after tax', 'pat ', 'sales ',
-        ]
-        if any(kw in text_lower for kw in earnings_keywords):
+        if any(kw in text_lower for kw in _EARNINGS_KEYWORDS):
             return True
 
-    # Direct financial results patterns (without Q1-Q4 prefix)
-    results_patterns = [
-        r'\bnet profit\b.*\brupees\b',
-        r'\bnet loss\b.*\brupees\b',
-        r'\brevenue\b.*\brupees\b.*\byoy\b',
-        r'\bebitda\b.*\brupees\b.*\byoy\b',
-        r'\bsl net profit\b',
-        r'\bcons net profit\b',
-        r'\bsl net loss\b',
-        r'\bcons net loss\b',
-    ]
-    for pattern in results_patterns:
-        if re.search(pattern, text_lower):
-            return True
+    return _RE_RESULTS.search(text_lower) is not None
 
-    return False
+
+_RE_PRICE_PCT = re.compile(r'\([+-]?\d+\.\d+%\)')
+_RE_DASH_COLON = re.compile(r'[-–—]\s*:\s*')
 
 
 def normalize_headline_for_exact_dedup(headline_text):
@@ -729,15 +1504,25 @@ def normalize_headline_for_exact_dedup(headline_text):
     Handles all known Nuvama format variations
     """
     # Remove stock price percentages (they change constantly)
-    text = re.sub(r'\([+-]?\d+\.\d+%\)', '', headline_text)
+    text = _RE_PRICE_PCT.sub('', headline_text)
     # Normalize Nuvama's "- :" placeholder (used when no stock price)
-    text = re.sub(r'[-–—]\s*:\s*', ': ', text)
+    text = _RE_DASH_COLON.sub(': ', text)
     # Collapse multiple spaces
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _RE_WHITESPACE.sub(' ', text).strip()
     # Lowercase for case-insensitive matching
     return text.lower()
 
 
+@lru_cache(maxsize=4096)
+def headline_fingerprint(headline_text):
+    """
+    (normalized text, exact-dedup ID) for a headline. Memoized: the same
+    headlines are scraped again on every check until they scroll off.
+    """
+    headline_normalized = normalize_headline_for_exact_dedup(headline_text)
+    return headline_normalized, headline_id(headline_normalized)
+
+
 # ---------- CONTEXTUAL DEDUP (Layer B) ----------
 
 # Stop words to filter out before computing content-word overlap.
@@ -777,105 +1562,128 @@ UNIT_CANON = {
     'rs': 'rupees', 'inr': 'rupees',
 }
 
+# Company suffixes dropped and plurals folded before unit/verb canonicalization
+_CONTEXT_WORD_FORMS = {
+    'ltd': '', 'limited': '',
+    'crores': 'crore', 'ncds': 'ncd', 'shares': 'share', 'orders': 'order',
+    'runit': 'unit', 'runits': 'unit',
+}
+
+# Every per-word rewrite composed into one lookup: word -> canonical ('' = drop)
+CONTEXT_WORD_CANON = {
+    w: UNIT_CANON.get(form, VERB_CANON.get(form, form))
+    for w, form in ((w, _CONTEXT_WORD_FORMS.get(w, w))
+                    for w in {*_CONTEXT_WORD_FORMS, *UNIT_CANON, *VERB_CANON})
+}
+
 
+# Contextual-dedup patterns (the price/dash patterns are shared with exact dedup)
+_RE_COLON = re.compile(r'\s*:\s*')
+_RE_DIGIT_COMMA = re.compile(r'(?<=\d),(?=\d)')  # 2,000 and 10,00,000 in one pass
+_RE_NON_WORD = re.compile(r'[^\w\s]')
+_RE_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+_RE_WORD = re.compile(r'\w+')
+
+
+@lru_cache(maxsize=4096)
 def canonicalize_for_context(text):
     """
     Normalize headline text for contextual comparison.
     More aggressive than exact-dedup normalization.
     Designed for cross-source dedup (Nuvama vs Stockwatch).
+    Cached: each check compares a headline against every memory entry.
     """
     text = text.lower().strip()
     # Remove stock price percentages like (-0.49%) or (+2.10%)
-    text = re.sub(r'\([+-]?\d+\.\d+%\)', '', text)
+    text = _RE_PRICE_PCT.sub('', text)
     # Remove Nuvama's "- :" placeholder
-    text = re.sub(r'[-\u2013\u2014]\s*:\s*', ' ', text)
+    text = _RE_DASH_COLON.sub(' ', text)
     # Remove standalone colons (left after price removal)
-    text = re.sub(r'\s*:\s*', ' ', text)
+    text = _RE_COLON.sub(' ', text)
     # Remove non-breaking spaces
     text = text.replace('\xa0', ' ')
     # Normalize comma-separated numbers BEFORE removing special chars: 2,000 → 2000
-    text = re.sub(r'(\d),(\d)', r'\1\2', text)
-    text = re.sub(r'(\d),(\d)', r'\1\2', text)  # Run twice for Indian format (10,00,000)
+    text = _RE_DIGIT_COMMA.sub('', text)
     # Remove ALL special chars except alphanumeric and spaces
-    text = re.sub(r'[^\w\s]', ' ', text)
-    # Strip common suffixes from company names
-    text = re.sub(r'\bltd\b', '', text)
-    text = re.sub(r'\blimited\b', '', text)
-    # Normalize common plural/singular financial terms
-    text = re.sub(r'\bcrores?\b', 'crore', text)
-    text = re.sub(r'\bncds?\b', 'ncd', text)
-    text = re.sub(r'\bshares?\b', 'share', text)
-    text = re.sub(r'\borders?\b', 'order', text)
-    text = re.sub(r'\brunits?\b', 'unit', text)
-
-    # Canonicalize financial units and verbs
-    words = text.split()
+    text = _RE_NON_WORD.sub(' ', text)
+    # Only word characters and spaces remain, so every word-level rewrite
+    # (suffixes, plurals, units, verbs) is one dict lookup per word
     canonical_words = []
-    for w in words:
-        if w in UNIT_CANON:
-            canonical_words.append(UNIT_CANON[w])
-        elif w in VERB_CANON:
-            canonical_words.append(VERB_CANON[w])
-        else:
+    for w in text.split():
+        w = CONTEXT_WORD_CANON.get(w, w)
+        if w:
             canonical_words.append(w)
-
-    text = ' '.join(canonical_words)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+    return ' '.join(canonical_words)
 
 
+@lru_cache(maxsize=4096)
 def extract_numbers(text):
-    """Extract all numeric values from text as a set of floats.
+    """Extract all numeric values from text as a frozenset of floats (cached).
     Handles comma-separated numbers like 2,000 and Indian format 10,00,000.
     """
     numbers = set()
-    # Normalize commas in numbers first: 2,000 → 2000
-    cleaned = re.sub(r'(\d),(\d)', r'\1\2', text)
-    cleaned = re.sub(r'(\d),(\d)', r'\1\2', cleaned)  # Run twice for Indian format
-    for match in re.findall(r'(\d+(?:\.\d+)?)', cleaned):
+    # Normalize commas in numbers first: 2,000 → 2000 (canonical text has no
+    # commas left, so the usual caller skips this pass)
+    cleaned = _RE_DIGIT_COMMA.sub('', text) if ',' in text else text
+    for match in _RE_NUMBER.findall(cleaned):
         try:
             val = float(match)
             if val > 0:  # Skip 0 (noise from cleaned text)
                 numbers.add(val)
         except ValueError:
             pass
-    return numbers
+    return frozenset(numbers)
+
+
+_company_alias_index = None
+
+
+def _get_company_alias_index():
+    """
+    Split the 3+ character Nifty 500 aliases (2-char ones give too many false
+    matches) into {single-word alias: canonical} and ((multi-word alias,
+    canonical), ...), with canonical names lowercased. Built once.
+    """
+    global _company_alias_index
+
+    if _company_alias_index is None:
+        _, aliases = load_nifty500_companies()
+        single = {}
+        multi = []
+        for alias, canonical in aliases.items():
+            if len(alias) < 3:
+                continue
+            if ' ' in alias:
+                multi.append((alias, canonical.lower()))
+            else:
+                single[alias] = canonical.lower()
+        _company_alias_index = (single, tuple(multi))
+    return _company_alias_index
+
+
+@lru_cache(maxsize=4096)
+def companies_mentioned(text):
+    """
+    Canonical names (lowercase) of the companies whose aliases appear in text.
+    Single-word aliases must match a whole word: "rec" must NOT match inside
+    "Receives". Cached, since memory entries are compared every check.
+    """
+    single, multi = _get_company_alias_index()
+    text_lower = text.lower()
+    # Single-word alias (e.g., "natco", "rec"): one dict lookup per word
+    found = {single[token] for token in set(_RE_WORD.findall(text_lower)) if token in single}
+    # Multi-word alias (e.g., "natco pharma"): substring match is safe
+    found.update(canonical for alias, canonical in multi if alias in text_lower)
+    return frozenset(found)
 
 
 def company_alias_overlap(text_a, text_b):
     """
     Compare two texts for company name overlap using Nifty500 aliases.
-    Uses word-boundary matching to avoid false positives.
-    E.g., alias "rec" must NOT match inside "Receives".
     Returns containment score 0.0-1.0 (fraction of shorter set in longer).
     """
-    _, aliases = load_nifty500_companies()
-
-    companies_a = set()
-    companies_b = set()
-
-    text_a_lower = text_a.lower()
-    text_b_lower = text_b.lower()
-    # Tokenize for single-word alias matching (O(1) set lookup, no substring)
-    tokens_a = set(re.findall(r'\b\w+\b', text_a_lower))
-    tokens_b = set(re.findall(r'\b\w+\b', text_b_lower))
-
-    for alias, canonical in aliases.items():
-        if len(alias) < 3:
-            continue  # Skip 2-char aliases — too many false matches
-        canonical_lower = canonical.lower()
-        if ' ' in alias:
-            # Multi-word alias (e.g., "natco pharma"): substring match is safe
-            if alias in text_a_lower:
-                companies_a.add(canonical_lower)
-            if alias in text_b_lower:
-                companies_b.add(canonical_lower)
-        else:
-            # Single-word alias (e.g., "natco", "rec"): word-level match only
-            if alias in tokens_a:
-                companies_a.add(canonical_lower)
-            if alias in tokens_b:
-                companies_b.add(canonical_lower)
+    companies_a = companies_mentioned(text_a)
+    companies_b = companies_mentioned(text_b)
 
     if not companies_a or not companies_b:
         return 0.0
@@ -888,14 +1696,64 @@ def company_alias_overlap(text_a, text_b):
     return len(intersection) / min_size if min_size else 0.0
 
 
-def contextual_similarity_score(headline_a, headline_b):
+def char_similarity(text_a, text_b):
+    """
+    Character-level similarity 0.0-1.0: rapidfuzz's C++ Indel ratio, or
+    difflib's SequenceMatcher ratio when rapidfuzz isn't installed.
+    """
+    if _fuzz_ratio is not None:
+        return _fuzz_ratio(text_a, text_b) / 100.0
+    return SequenceMatcher(None, text_a, text_b).ratio()
+
+
+def char_similarities(text, others):
+    """char_similarity of text against each of others, in one rapidfuzz call when available"""
+    if _fuzz_extract is not None:
+        # extract returns (choice, score, index) best first; put scores back in order
+        scores = [0.0] * len(others)
+        for _, score, i in _fuzz_extract(text, others, scorer=_fuzz_ratio, limit=None):
+            scores[i] = score / 100.0
+        return scores
+    return [char_similarity(text, other) for other in others]
+
+
+# Signal weights of contextual_similarity_score, without and with embeddings
+CONTEXT_SCORE_WEIGHTS = {
+    'seq': 0.20, 'jaccard': 0.20, 'containment': 0.20, 'numbers': 0.15,
+    'company': 0.25, 'embedding': 0.0,
+}
+CONTEXT_SCORE_WEIGHTS_EMBEDDING = {
+    'seq': 0.15, 'jaccard': 0.15, 'containment': 0.15, 'numbers': 0.10,
+    'company': 0.25, 'embedding': 0.10,
+}
+SAME_COMPANY_BONUS = 0.08
+
+
+@lru_cache(maxsize=4096)
+def context_features(headline):
+    """
+    (canonical text, content words, numbers) of a headline for
+    contextual_similarity_score, computed once per headline rather than per pair.
+    Content words drop stop words and words of 2 chars or less. Numbers come
+    from the CANONICAL text (not original) to avoid picking up stock price
+    changes like (-1.60%) which are noise.
+    """
+    canon = canonicalize_for_context(headline)
+    content = frozenset(w for w in canon.split() if w not in STOP_WORDS and len(w) > 2)
+    return canon, content, extract_numbers(canon)
+
+
+def contextual_similarity_score(headline_a, headline_b, embedding_score=None, seq_score=None):
     """
     Compute weighted contextual similarity between two headlines.
     Returns float 0.0-1.0.
+    embedding_score: precomputed embedding cosine similarity (embedding dedup
+    only); computed here when not given.
+    seq_score: precomputed char_similarity of the canonical forms, likewise.
     Designed to catch cross-source duplicates (same news from Nuvama + Stockwatch).
 
     Uses 5 signals:
-    1. SequenceMatcher ratio (character-level similarity)
+    1. Character-level similarity (char_similarity)
     2. Content-word Jaccard (stop words removed, meaningful words only)
     3. Content-word containment (what % of shorter headline's words appear in longer)
     4. Numeric overlap (shared amounts/figures — extracted from canonical text)
@@ -908,35 +1766,30 @@ def contextual_similarity_score(headline_a, headline_b):
               Chennai API Unit, Inspections Marked As Voluntary Action..."
     The short headline is almost fully contained in the long one.
     """
-    canon_a = canonicalize_for_context(headline_a)
-    canon_b = canonicalize_for_context(headline_b)
+    canon_a, content_a, nums_a = context_features(headline_a)
+    canon_b, content_b, nums_b = context_features(headline_b)
 
-    # 1. SequenceMatcher text similarity
-    seq_score = SequenceMatcher(None, canon_a, canon_b).ratio()
-
-    # 2 & 3. Content-word Jaccard + Containment (filter stop words for better signal)
-    words_a = canon_a.split()
-    words_b = canon_b.split()
-    content_a = set(w for w in words_a if w not in STOP_WORDS and len(w) > 2)
-    content_b = set(w for w in words_b if w not in STOP_WORDS and len(w) > 2)
+    # 1. Character-level text similarity
+    if seq_score is None:
+        seq_score = char_similarity(canon_a, canon_b)
 
+    # 2 & 3. Content-word Jaccard + Containment (stop words filtered for better signal)
     if content_a and content_b:
-        common_content = content_a & content_b
+        # Set sizes only: |A ∪ B| = |A| + |B| - |A ∩ B| needs no union set
+        common_content = len(content_a & content_b)
         # Jaccard: symmetric overlap
-        content_jaccard = len(common_content) / len(content_a | content_b)
+        content_jaccard = common_content / (len(content_a) + len(content_b) - common_content)
         # Containment: what % of the SHORTER headline's content is in the longer one
         # Key insight: cross-source dups are often short vs long versions of same news
-        content_containment = len(common_content) / min(len(content_a), len(content_b))
+        content_containment = common_content / min(len(content_a), len(content_b))
     else:
         content_jaccard = 0.0
         content_containment = 0.0
 
-    # 4. Numeric overlap — use CANONICAL text (not original) to avoid
-    #    picking up stock price changes like (-1.60%) which are noise
-    nums_a = extract_numbers(canon_a)
-    nums_b = extract_numbers(canon_b)
+    # 4. Numeric overlap (from the canonical text, see context_features)
     if nums_a or nums_b:
-        num_overlap = len(nums_a & nums_b) / len(nums_a | nums_b)
+        common_nums = len(nums_a & nums_b)
+        num_overlap = common_nums / (len(nums_a) + len(nums_b) - common_nums)
     else:
         num_overlap = 0.5  # No numbers in either — neutral
 
@@ -944,9 +1797,8 @@ def contextual_similarity_score(headline_a, headline_b):
     company_score = company_alias_overlap(headline_a, headline_b)
 
     # 6. Embedding similarity (optional)
-    embedding_score = 0.0
-    embedding_enabled = False
-    if ENABLE_EMBEDDING_DEDUP:
+    embedding_enabled = embedding_score is not None
+    if ENABLE_EMBEDDING_DEDUP and not embedding_enabled:
         try:
             embedding_score = compute_embedding_similarity(headline_a, headline_b)
             embedding_enabled = True
@@ -954,61 +1806,127 @@ def contextual_similarity_score(headline_a, headline_b):
             pass
 
     # Weighted combination
+    weights = CONTEXT_SCORE_WEIGHTS_EMBEDDING if embedding_enabled else CONTEXT_SCORE_WEIGHTS
+    score = (
+        weights['seq'] * seq_score +
+        weights['jaccard'] * content_jaccard +
+        weights['containment'] * content_containment +
+        weights['numbers'] * num_overlap +
+        weights['company'] * company_score
+    )
     if embedding_enabled:
-        score = (
-            0.15 * seq_score +
-            0.15 * content_jaccard +
-            0.15 * content_containment +
-            0.10 * num_overlap +
-            0.25 * company_score +
-            0.10 * embedding_score
-        )
-    else:
-        score = (
-            0.20 * seq_score +
-            0.20 * content_jaccard +
-            0.20 * content_containment +
-            0.15 * num_overlap +
-            0.25 * company_score
-        )
+        score += weights['embedding'] * embedding_score
 
     # Same-company bonus: when the same company appears in both headlines,
     # they're likely about the same event across sources.
     if company_score >= 0.5:
-        score += 0.08
+        score += SAME_COMPANY_BONUS
 
     return min(score, 1.0)
 
 
+def context_score_upper_bound(seq_score, company_score, embedding_score=None):
+    """
+    Highest contextual_similarity_score a pair can reach given its character
+    and company scores (and embedding score, if known), with the content-word
+    and number signals at their 1.0 maximum.
+    """
+    if embedding_score is not None:
+        weight_sets = [(CONTEXT_SCORE_WEIGHTS_EMBEDDING, embedding_score)]
+    else:
+        weight_sets = [(CONTEXT_SCORE_WEIGHTS, 0.0)]
+        if ENABLE_EMBEDDING_DEDUP:  # Embedding may still be computed per pair
+            weight_sets.append((CONTEXT_SCORE_WEIGHTS_EMBEDDING, 1.0))
+    bonus = SAME_COMPANY_BONUS if company_score >= 0.5 else 0.0
+    return max(
+        weights['seq'] * seq_score + weights['jaccard'] + weights['containment'] +
+        weights['numbers'] + weights['company'] * company_score +
+        weights['embedding'] * embedding + bonus
+        for weights, embedding in weight_sets
+    )
+
+
+_context_memory = None  # Loaded once, then kept in memory across checks
+_context_memory_unsaved = []  # Entries added since the last save
+_context_memory_lines = 0  # Lines in CONTEXT_MEMORY_FILE
+
+
+def _prune_context_memory(memory):
+    """Keep entries from the last CONTEXT_MEMORY_HOURS, newest CONTEXT_MEMORY_MAX_ENTRIES"""
+    cutoff = datetime.now(IST) - timedelta(hours=CONTEXT_MEMORY_HOURS)
+    pruned = []
+    for entry in memory:
+        try:
+            entry_time = datetime.fromisoformat(entry['timestamp'])
+            if entry_time > cutoff:
+                pruned.append(entry)
+        except:
+            pruned.append(entry)
+    return pruned[-CONTEXT_MEMORY_MAX_ENTRIES:]
+
+
+def _write_context_memory(memory):
+    """Rewrite the NDJSON context memory file from memory (oldest first)"""
+    global _context_memory_lines
+
+    atomic_write(CONTEXT_MEMORY_FILE, b"".join(
+        orjson.dumps(entry, default=str, option=orjson.OPT_APPEND_NEWLINE) for entry in memory
+    ))
+    _context_memory_lines = len(memory)
+
+
 def load_context_memory():
-    """Load contextual dedup memory from file"""
+    """Load contextual dedup memory (read from file on first use only)"""
+    global _context_memory, _context_memory_lines
+
+    if _context_memory is not None:
+        return _context_memory
+    entries = []
     try:
-        with open(CONTEXT_MEMORY_FILE, 'r') as f:
-            data = json.load(f)
+        with open(CONTEXT_MEMORY_FILE, 'rb') as f:
+            lines = f.readlines()
+        _context_memory_lines = len(lines)
+        for line in lines:
+            try:
+                entry = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue  # Blank or torn line from an interrupted append
+            if isinstance(entry, dict):
+                entries.append(entry)
+    except FileNotFoundError:
+        # One-time conversion of the old JSON-array file
+        try:
+            with open(LEGACY_CONTEXT_MEMORY_FILE, 'rb') as f:
+                data = orjson.loads(f.read())
             if isinstance(data, list):
-                return data
-            return []
+                entries = _prune_context_memory([e for e in data if isinstance(e, dict)])
+                _write_context_memory(entries)
+        except:
+            entries = []
     except:
-        return []
+        entries = []
+    _context_memory = _prune_context_memory(entries)
+    return _context_memory
 
 
 def save_context_memory(memory):
-    """Save contextual dedup memory, pruning old entries"""
-    try:
-        cutoff = datetime.now(IST) - timedelta(hours=24)
-        pruned = []
-        for entry in memory:
-            try:
-                entry_time = datetime.fromisoformat(entry['timestamp'])
-                if entry_time > cutoff:
-                    pruned.append(entry)
-            except:
-                pruned.append(entry)
-
-        pruned = pruned[-200:]
+    """Prune contextual dedup memory and append the entries added since the last save"""
+    global _context_memory, _context_memory_lines
 
-        with open(CONTEXT_MEMORY_FILE, 'w') as f:
-            json.dump(pruned, f, indent=2, default=str)
+    try:
+        _context_memory = _prune_context_memory(memory)
+        if _context_memory_unsaved:
+            with open(CONTEXT_MEMORY_FILE, 'ab') as f:
+                f.write(b"".join(
+                    orjson.dumps(entry, default=str, option=orjson.OPT_APPEND_NEWLINE)
+                    for entry in _context_memory_unsaved
+                ))
+            _context_memory_lines += len(_context_memory_unsaved)
+            _context_memory_unsaved.clear()
+
+        # Compact occasionally; expired lines are skipped on load until then
+        if _context_memory_lines > 2 * CONTEXT_MEMORY_MAX_ENTRIES:
+            _write_context_memory(_context_memory)
     except Exception as e:
         log_error("save_context_memory", str(e), f"Memory entries: {len(memory)}")
 
@@ -1017,22 +1935,47 @@ def is_context_duplicate(headline_text, context_memory, source=""):
     """
     Check if headline is a contextual duplicate of a recent alert from the OTHER source.
     Only compares cross-source (Nuvama vs Stockwatch), not within the same source.
-    Returns (is_duplicate, best_match_score, matched_headline)
+    Returns (is_duplicate, best_match_score, matched_headline); the best score
+    only counts pairs whose upper bound could reach the threshold.
     """
     if not context_memory:
         return False, 0.0, ""
 
+    # Only compare against headlines from a DIFFERENT source
+    entries = [
+        entry for entry in context_memory
+        if not (source and entry.get('source') and entry.get('source') == source)
+    ]
+
+    # Embedding scores against all entries in one matrix product
+    embedding_scores = None
+    if ENABLE_EMBEDDING_DEDUP and entries:
+        try:
+            embedding_scores = embedding_similarities(headline_text, entries)
+        except Exception:
+            pass
+
+    # Character similarity against all entries in one call
+    stored_headlines = [entry.get('headline', '') for entry in entries]
+    seq_scores = char_similarities(
+        context_features(headline_text)[0],
+        [context_features(stored)[0] for stored in stored_headlines]
+    )
+
     best_score = 0.0
     best_match = ""
 
-    for entry in context_memory:
-        # Only compare against headlines from a DIFFERENT source
-        entry_source = entry.get('source', '')
-        if source and entry_source and entry_source == source:
-            continue  # Skip same-source entries
-
-        stored_headline = entry.get('headline', '')
-        score = contextual_similarity_score(headline_text, stored_headline)
+    for i, stored_headline in enumerate(stored_headlines):
+        embedding_score = None if embedding_scores is None else float(embedding_scores[i])
+        # Skip the remaining signals for pairs that can't reach the threshold
+        upper_bound = context_score_upper_bound(
+            seq_scores[i], company_alias_overlap(headline_text, stored_headline), embedding_score
+        )
+        if upper_bound + 1e-9 < CONTEXTUAL_DEDUP_THRESHOLD:
+            continue
+        score = contextual_similarity_score(
+            headline_text, stored_headline, embedding_score, seq_scores[i]
+        )
         if score > best_score:
             best_score = score
             best_match = stored_headline
@@ -1043,17 +1986,19 @@ def is_context_duplicate(headline_text, context_memory, source=""):
 
 def add_to_context_memory(context_memory, headline_text, source, company="", embedding=None):
     """Add a sent headline to contextual memory for future dedup"""
-    canon = canonicalize_for_context(headline_text)
+    # Scoring reads the entry's sets from context_features, so computing them
+    # here caches them for every later comparison
+    canon = context_features(headline_text)[0]
     entry = {
         'headline': headline_text,
         'canonical': canon,
-        'tokens': canon.split(),
         'timestamp': datetime.now(IST).isoformat(),
         'source': source,
         'company': company,
         'embedding': embedding
     }
     context_memory.append(entry)
+    _context_memory_unsaved.append(entry)
     return context_memory
 
 
@@ -1063,18 +2008,23 @@ _embedding_model = None
 
 
 def get_embedding_model():
-    """Lazy-load the sentence transformer model"""
+    """Lazy-load the embedding model for EMBEDDING_BACKEND"""
     global _embedding_model
     if _embedding_model is not None:
         return _embedding_model
 
     try:
-        from sentence_transformers import SentenceTransformer
-        _embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
-        print(f"Loaded embedding model: {EMBEDDING_MODEL_NAME}")
+        if EMBEDDING_BACKEND == "model2vec":
+            from model2vec import StaticModel
+            _embedding_model = StaticModel.from_pretrained(EMBEDDING_MODEL_NAME)
+        else:
+            from sentence_transformers import SentenceTransformer
+            _embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        print(f"Loaded embedding model: {EMBEDDING_MODEL_NAME} ({EMBEDDING_BACKEND})")
         return _embedding_model
     except ImportError:
-        print("Warning: sentence-transformers not installed. Embedding dedup disabled.")
+        package = "model2vec" if EMBEDDING_BACKEND == "model2vec" else "sentence-transformers"
+        print(f"Warning: {package} not installed. Embedding dedup disabled.")
         return None
     except Exception as e:
         log_error("embedding_load", str(e), EMBEDDING_MODEL_NAME)
@@ -1082,26 +2032,79 @@ def get_embedding_model():
         return None
 
 
-def compute_embedding_similarity(text_a, text_b):
-    """Compute cosine similarity between two texts using embeddings"""
+EMBEDDING_BATCH_SIZE = 64
+
+
+def encode_embeddings(texts):
+    """Unit-length embeddings (one row per text) from the configured backend"""
     model = get_embedding_model()
     if model is None:
         raise RuntimeError("Embedding model not available")
+    if EMBEDDING_BACKEND == "model2vec":
+        import numpy as np
+        vectors = np.asarray(model.encode(texts, batch_size=EMBEDDING_BATCH_SIZE), dtype=np.float32)
+        # Text with no in-vocabulary tokens encodes to a zero vector; keep it zero, not NaN
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    return model.encode(texts, batch_size=EMBEDDING_BATCH_SIZE, normalize_embeddings=True)
+
+
+@lru_cache(maxsize=256)
+def _unit_embedding(text):
+    """
+    Unit-length embedding of text. Cached so a headline that is scored and
+    then sent is encoded once, not again when stored in context memory.
+    """
+    return encode_embeddings([text])[0]
+
+
+# (timestamp, headline) of a context-memory entry -> its unit-length float32
+# vector, so stored embeddings are converted from lists and normalized once
+_embedding_rows = {}
+
 
-    embeddings = model.encode([text_a, text_b])
+def embedding_similarities(text, entries):
+    """
+    Cosine similarity of text to each context-memory entry, as one array.
+    Entries use their stored embedding; ones saved without it (or by a model
+    of another size) are encoded in a single batch and keep the new vector.
+    """
+    import numpy as np
+
+    vector = _unit_embedding(text)
+    missing = [
+        entry for entry in entries
+        if not entry.get('embedding') or len(entry['embedding']) != len(vector)
+        or entry['embedding'][0] is None  # NaN row, saved by orjson as nulls
+    ]
+    if missing:
+        encoded = encode_embeddings([entry.get('headline', '') for entry in missing])
+        for entry, row in zip(missing, encoded):
+            entry['embedding'] = row.tolist()
+            _embedding_rows.pop((entry.get('timestamp'), entry.get('headline')), None)
+
+    if len(_embedding_rows) > 1024:
+        _embedding_rows.clear()  # Drops rows of pruned entries; live ones are rebuilt below
+    keys = [(entry.get('timestamp'), entry.get('headline')) for entry in entries]
+    new = [(key, entry) for key, entry in zip(keys, entries) if key not in _embedding_rows]
+    if new:
+        rows = np.asarray([entry['embedding'] for _, entry in new], dtype=np.float32)
+        # Older entries were stored unnormalized
+        rows /= np.maximum(np.linalg.norm(rows, axis=1, keepdims=True), 1e-12)
+        _embedding_rows.update(zip((key for key, _ in new), rows))
+
+    return np.stack([_embedding_rows[key] for key in keys]) @ vector
+
+
+def compute_embedding_similarity(text_a, text_b):
+    """Compute cosine similarity between two texts using embeddings"""
     from numpy import dot
-    from numpy.linalg import norm
-    cos_sim = dot(embeddings[0], embeddings[1]) / (norm(embeddings[0]) * norm(embeddings[1]))
-    return float(cos_sim)
+    return float(dot(_unit_embedding(text_a), _unit_embedding(text_b)))
 
 
 def get_embedding(text):
     """Get embedding vector for a single text (for storage in context memory)"""
-    model = get_embedding_model()
-    if model is None:
-        return None
     try:
-        return model.encode(text).tolist()
+        return _unit_embedding(text).tolist()
     except:
         return None
 
@@ -1109,11 +2112,12 @@ def get_embedding(text):
 def check_and_notify():
     """Check for new headlines from all sources and send notifications"""
     print("=" * 60)
-    print(f"Checking... {datetime.now(IST).strftime('%Y-%m-%d %I:%M:%S %p IST')}")
+    now_ist = datetime.now(IST)
+    print(f"Checking... {now_ist.strftime('%Y-%m-%d %I:%M:%S %p IST')}")
 
     seen_ids = load_seen()
     context_memory = load_context_memory()
-    headlines = get_all_headlines()
+    headlines = get_all_headlines(now_ist)
 
     if not headlines:
         print("No headlines found from any source")
@@ -1127,6 +2131,8 @@ def check_and_notify():
     # Load Nifty 500 for Stockwatch filtering
     nifty500_companies, _ = load_nifty500_companies()
 
+    new_entries = []  # Written to the database in one append after the loop
+
     for h in headlines:
         headline_text = h['headline']
         timestamp = h['timestamp']
@@ -1136,12 +2142,12 @@ def check_and_notify():
         company = h.get('company', '')
 
         # --- LAYER A: Exact dedup ---
-        headline_normalized = normalize_headline_for_exact_dedup(headline_text)
-        h_id = hashlib.md5(headline_normalized.encode()).hexdigest()
+        headline_normalized, h_id = headline_fingerprint(headline_text)
 
-        if h_id in seen_ids:
+        if is_seen(seen_ids, headline_normalized, h_id):
+            mark_seen(seen_ids, h_id)  # Re-warms on-disk and legacy MD5 hits
             continue
-        seen_ids.add(h_id)
+        mark_seen(seen_ids, h_id)
 
         # --- Nifty 500 filter (Stockwatch only) ---
         if source == 'STOCKWATCH' and nifty500_companies:
@@ -1157,7 +2163,7 @@ def check_and_notify():
                 print(f"Skipping old [{source}]: {headline_text[:50]}... [{timestamp}]")
 
         # --- Always save to database ---
-        save_headline_to_db(headline_text, timestamp, source, company)
+        new_entries.append(build_headline_entry(headline_text, timestamp, source, company, now_ist, datetime_obj))
 
         if not should_send_alert:
             continue
@@ -1179,9 +2185,9 @@ def check_and_notify():
         if send_telegram(headline_text, source, company):
             embedding = get_embedding(headline_text) if ENABLE_EMBEDDING_DEDUP else None
             context_memory = add_to_context_memory(context_memory, headline_text, source, company, embedding)
-            time.sleep(2)
 
     # Persist state
+    save_headlines_to_db(new_entries[::-1])  # Collected newest first; the file is oldest first
     save_seen(seen_ids)
     save_context_memory(context_memory)
     save_last_check_timestamp()
@@ -1189,118 +2195,155 @@ def check_and_notify():
     print(f"Check complete. Context memory: {len(context_memory)} entries")
 
 
-# Main loop
-print("=" * 60)
-print("UNIFIED NEWS MONITOR - NUVAMA + STOCKWATCH")
-print("=" * 60)
-print(f"Checking every {CHECK_INTERVAL_SECONDS} seconds")
-print(f"IST Timezone: UTC+5:30")
-print(f"Stockwatch feed: {ENABLE_STOCKWATCH}")
-print(f"Exclude results alerts: {EXCLUDE_RESULTS_ALERTS}")
-print(f"Embedding dedup: {ENABLE_EMBEDDING_DEDUP}")
-print(f"Contextual dedup threshold: {CONTEXTUAL_DEDUP_THRESHOLD}")
-print("=" * 60 + "\n")
-
-# Load Nifty 500 at startup
-load_nifty500_companies()
-
-# Clean up database: remove non-Nifty500 entries, duplicates, broken timestamps
-cleanup_database()
-
-# Check if this is a restart
-last_check = load_last_check_timestamp()
-if last_check:
-    downtime = datetime.now(IST) - last_check
-    print("[!] RESTART DETECTED")
-    print(f"Last check: {last_check.strftime('%d %b %Y %I:%M:%S %p IST')}")
-    print(f"Downtime: {downtime}")
-    print(f"Will send ONLY headlines newer than last check to Telegram\n")
-else:
-    print("[*] FIRST RUN - Initializing baseline\n")
-
-# Send startup message
-send_telegram(
-    "🔄 Unified Monitor restarted! Tracking Nuvama + Stockwatch. Only new headlines will be sent."
-)
+# ---------- MAIN LOOP ----------
 
-# Initial baseline with timestamp-based filtering
-print("Setting baseline...")
-initial_headlines = get_all_headlines()
-initial_seen = load_seen()  # Load existing seen IDs
-initial_context_memory = load_context_memory()
-nifty500_companies, _ = load_nifty500_companies()
-
-for h in initial_headlines:
-    headline_text = h['headline']
-    timestamp = h['timestamp']
-    datetime_obj = h['datetime']
-    category = h.get('category', '')
-    source = h.get('source', 'NUVAMA')
-    company = h.get('company', '')
-
-    # Nifty 500 filter (Stockwatch only) — apply to ALL headlines, not just new
-    if source == 'STOCKWATCH' and nifty500_companies:
-        if not is_nifty500_match(company, headline_text):
-            headline_normalized = normalize_headline_for_exact_dedup(headline_text)
-            h_id = hashlib.md5(headline_normalized.encode()).hexdigest()
-            initial_seen.add(h_id)
-            continue
+def startup():
+    """Print the banner and prepare state files; returns the last check time"""
+    print("=" * 60)
+    print("UNIFIED NEWS MONITOR - NUVAMA + STOCKWATCH")
+    print("=" * 60)
+    print(f"Checking every {CHECK_INTERVAL_SECONDS} seconds")
+    print(f"IST Timezone: UTC+5:30")
+    print(f"Telegram alerts: {TELEGRAM_ENABLED}")
+    print(f"Stockwatch feed: {ENABLE_STOCKWATCH}")
+    print(f"Exclude results alerts: {EXCLUDE_RESULTS_ALERTS}")
+    print(f"Embedding dedup: {ENABLE_EMBEDDING_DEDUP}")
+    print(f"Contextual dedup threshold: {CONTEXTUAL_DEDUP_THRESHOLD}")
+    print("=" * 60 + "\n")
 
-    # Layer A: Exact dedup
-    headline_normalized = normalize_headline_for_exact_dedup(headline_text)
-    h_id = hashlib.md5(headline_normalized.encode()).hexdigest()
+    # Load Nifty 500 at startup
+    load_nifty500_companies()
 
-    is_new = h_id not in initial_seen
-    should_alert = False
+    # Convert a pre-NDJSON headlines database, if present
+    migrate_legacy_headlines_db()
 
-    if is_new:
-        # Only save NEW headlines to database (don't re-insert old ones on restart)
-        save_headline_to_db(headline_text, timestamp, source, company)
+    # Clean up database: remove non-Nifty500 entries, duplicates, broken timestamps
+    cleanup_database()
 
-        if last_check and datetime_obj:
-            if datetime_obj > last_check:
-                should_alert = True
+    # Check if this is a restart
+    last_check = load_last_check_timestamp()
+    if last_check:
+        downtime = datetime.now(IST) - last_check
+        print("[!] RESTART DETECTED")
+        print(f"Last check: {last_check.strftime('%d %b %Y %I:%M:%S %p IST')}")
+        print(f"Downtime: {downtime}")
+        print(f"Will send ONLY headlines newer than last check to Telegram\n")
+    else:
+        print("[*] FIRST RUN - Initializing baseline\n")
 
-    # Send alert only if truly new and newer than last check
-    if is_new and should_alert:
-        if EXCLUDE_RESULTS_ALERTS and is_results_headline(headline_text, category):
-            print(f"[FILTERED] Result skipped [{source}]: {headline_text[:60]}...")
-        else:
-            # Layer B: Contextual dedup
-            is_dup, score, matched = is_context_duplicate(headline_text, initial_context_memory, source)
-            if is_dup:
-                print(f"[Cross-Source Dup {score:.2f}] [{source}]: {headline_text[:60]}...")
+    return last_check
+
+
+def set_baseline(last_check):
+    """Process the headlines already on the page so only new ones alert"""
+    # Send startup message
+    send_telegram(
+        "🔄 Unified Monitor restarted! Tracking Nuvama + Stockwatch. Only new headlines will be sent."
+    )
+
+    # Initial baseline with timestamp-based filtering
+    print("Setting baseline...")
+    baseline_now = datetime.now(IST)
+    initial_headlines = get_all_headlines(baseline_now)
+    initial_seen = load_seen()  # Load existing seen IDs
+    initial_context_memory = load_context_memory()
+    nifty500_companies, _ = load_nifty500_companies()
+    new_entries = []  # Written to the database in one append after the loop
+
+    for h in initial_headlines:
+        headline_text = h['headline']
+        timestamp = h['timestamp']
+        datetime_obj = h['datetime']
+        category = h.get('category', '')
+        source = h.get('source', 'NUVAMA')
+        company = h.get('company', '')
+
+        headline_normalized, h_id = headline_fingerprint(headline_text)
+
+        # Nifty 500 filter (Stockwatch only) — apply to ALL headlines, not just new
+        if source == 'STOCKWATCH' and nifty500_companies:
+            if not is_nifty500_match(company, headline_text):
+                mark_seen(initial_seen, h_id)
+                continue
+
+        # Layer A: Exact dedup
+
+        is_new = not is_seen(initial_seen, headline_normalized, h_id)
+        should_alert = False
+
+        if is_new:
+            # Only save NEW headlines to database (don't re-insert old ones on restart)
+            new_entries.append(
+                build_headline_entry(headline_text, timestamp, source, company, baseline_now, datetime_obj)
+            )
+
+            if last_check and datetime_obj:
+                if datetime_obj > last_check:
+                    should_alert = True
+
+        # Send alert only if truly new and newer than last check
+        if is_new and should_alert:
+            if EXCLUDE_RESULTS_ALERTS and is_results_headline(headline_text, category):
+                print(f"[FILTERED] Result skipped [{source}]: {headline_text[:60]}...")
             else:
-                print(f"[ALERT] New during downtime [{source}]: {headline_text[:60]}...")
-                if send_telegram(headline_text, source, company):
-                    embedding = get_embedding(headline_text) if ENABLE_EMBEDDING_DEDUP else None
-                    initial_context_memory = add_to_context_memory(
-                        initial_context_memory, headline_text, source, company, embedding
-                    )
-                    time.sleep(2)
-
-    initial_seen.add(h_id)
-
-save_seen(initial_seen)
-save_context_memory(initial_context_memory)
-save_last_check_timestamp()
-print(f"Baseline set: {len(initial_headlines)} current headlines\n")
-
-# Run forever
-check_count = 0
-while True:
-    try:
-        check_count += 1
-        print(f"\n--- Check #{check_count} ---")
-        check_and_notify()
-        print(f"Waiting {CHECK_INTERVAL_SECONDS} seconds...\n")
-        time.sleep(CHECK_INTERVAL_SECONDS)
-    except KeyboardInterrupt:
-        print("\n[!] Stopped by user")
-        save_last_check_timestamp()
-        break
-    except Exception as e:
-        log_error("main_loop", str(e), f"Check #{check_count}")
-        print(f"Error: {e}")
-        print("Retrying in 60 seconds...")
-        time.sleep(60)
+                # Layer B: Contextual dedup
+                is_dup, score, matched = is_context_duplicate(headline_text, initial_context_memory, source)
+                if is_dup:
+                    print(f"[Cross-Source Dup {score:.2f}] [{source}]: {headline_text[:60]}...")
+                else:
+                    print(f"[ALERT] New during downtime [{source}]: {headline_text[:60]}...")
+                    if send_telegram(headline_text, source, company):
+                        embedding = get_embedding(headline_text) if ENABLE_EMBEDDING_DEDUP else None
+                        initial_context_memory = add_to_context_memory(
+                            initial_context_memory, headline_text, source, company, embedding
+                        )
+
+        mark_seen(initial_seen, h_id)
+
+    save_headlines_to_db(new_entries[::-1])  # Collected newest first; the file is oldest first
+    save_seen(initial_seen)
+    save_context_memory(initial_context_memory)
+    save_last_check_timestamp()
+    print(f"Baseline set: {len(initial_headlines)} current headlines\n")
+
+
+def run_forever():
+    """Check for new headlines every CHECK_INTERVAL_SECONDS until interrupted"""
+    check_count = 0
+    next_check = time.monotonic()
+    while True:
+        try:
+            check_count += 1
+            print(f"\n--- Check #{check_count} ---")
+            check_and_notify()
+
+            # Checks start CHECK_INTERVAL_SECONDS apart: time spent scraping and
+            # pacing Telegram sends comes out of the wait instead of adding to it
+            next_check += CHECK_INTERVAL_SECONDS
+            wait = next_check - time.monotonic()
+            if wait < 0:
+                next_check, wait = time.monotonic(), 0  # Overran; don't try to catch up
+            print(f"Waiting {wait:.0f} seconds...\n")
+            time.sleep(wait)
+        except KeyboardInterrupt:
+            print("\n[!] Stopped by user")
+            save_last_check_timestamp()
+            close_browser()
+            break
+        except Exception as e:
+            log_error("main_loop", str(e), f"Check #{check_count}")
+            print(f"Error: {e}")
+            print("Retrying in 60 seconds...")
+            time.sleep(60)
+            next_check = time.monotonic()
+
+
+def main():
+    """Run the monitor: startup, baseline, then the check loop"""
+    last_check = startup()
+    set_baseline(last_check)
+    run_forever()
+
+
+if __name__ == "__main__":
+    main()
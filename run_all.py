@@ -2,38 +2,28 @@
 Run both the news monitor and web dashboard together
 """
 
-import threading
-import subprocess
-import time
-import sys
 import os
+import time
 
+WEB_SERVER_RESTART_SECONDS = 10
 
-# Ensure subprocesses use UTF-8 and flush output immediately
-_subprocess_env = {**os.environ, "PYTHONUNBUFFERED": "1", "PYTHONIOENCODING": "utf-8"}
 
+def run_in_process():
+    """Run the dashboard with the news monitor as a thread of this process"""
+    # Set here rather than read from .env, so only this launcher embeds the
+    # monitor and a separately started main.py + app.py pair never runs two
+    os.environ["EMBED_MONITOR"] = "true"  # Read by app at import
+    import app
 
-def run_news_monitor():
-    """Run the news monitoring script"""
+    # The monitor thread restarts itself after a crash; restart the server here
+    app.start_embedded_monitor()
     while True:
         try:
-            subprocess.run([sys.executable, "main.py"], check=False, env=_subprocess_env)
-        except Exception as e:
-            print(f"News monitor error: {e}")
-            time.sleep(10)
-
-
-def run_web_server():
-    """Run the Flask web server"""
-    while True:
-        try:
-            result = subprocess.run([sys.executable, "app.py"], check=False, env=_subprocess_env)
-            # If Flask exits cleanly, break the loop (don't restart)
-            if result.returncode == 0:
-                break
+            app.serve_dashboard()
+            break  # Server stopped cleanly
         except Exception as e:
             print(f"Web server error: {e}")
-        time.sleep(10)
+        time.sleep(WEB_SERVER_RESTART_SECONDS)
 
 
 if __name__ == "__main__":
@@ -44,12 +34,4 @@ if __name__ == "__main__":
     print("Web Dashboard: http://localhost:5000")
     print("=" * 60 + "\n")
 
-    # Start news monitor in a separate thread
-    monitor_thread = threading.Thread(target=run_news_monitor, daemon=True)
-    monitor_thread.start()
-
-    # Give monitor a moment to start
-    time.sleep(2)
-
-    # Run web server in main thread (blocks here)
-    run_web_server()
+    run_in_process()
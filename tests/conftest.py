@@ -0,0 +1,19 @@
+import pytest
+
+import main
+
+
+@pytest.fixture
+def state_dir(tmp_path, monkeypatch):
+    """Run in an empty directory with main.py's cached file state reset"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "_headlines_db_lines", None)
+    monkeypatch.setattr(main, "_headline_listeners", [])
+    monkeypatch.setattr(main, "_seen_db", None)
+    monkeypatch.setattr(main, "_seen_ids", None)
+    monkeypatch.setattr(main, "_seen_has_md5_ids", False)
+    monkeypatch.setattr(main, "_seen_pending", [])
+    monkeypatch.setattr(main, "_seen_last_prune", 0.0)
+    yield tmp_path
+    if main._seen_db is not None:
+        main._seen_db.close()
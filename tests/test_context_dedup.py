@@ -0,0 +1,58 @@
+from itertools import combinations
+
+import pytest
+
+import main
+
+HEADLINES = [
+    "Divi's Labs (+0.96%) : Company Expects Ongoing Strong Growth By Launching New Products",
+    "Divi's Laboratories: Expects strong growth from new product launches",
+    "Citi on Mahindra & Mahindra (+0.63%) : Maintain Buy with target price of ₹4,230 unchanged",
+    "Citi maintains Buy on M&M, target price Rs 4,230",
+    "Bernstein maintains 'Outperform' ratings on PB Fintech with a target price of Rs 2,210.",
+    "Jefferies maintains 'Buy' ratings on Afcons, cuts target price to Rs 440.",
+    "Vikram Solar (+4.53%) : Company Signs Agreement to Increase Working Capital Facilities to ₹3,200 Crore",
+    "Vikram Solar signs pact to raise working capital limits to Rs 3,200 cr led by Indian Bank",
+    "Bayer Cropscience: Q3 Sl Net Profit 957m Rupees Vs 342m (Yoy) || Q3 Revenue 11.1b Rupees",
+    "Ircon International: Q3 Cons Net Profit 1b Rupees Vs 866m (Yoy) || Q3 Revenue 21.2b Rupees",
+    "Natco Pharma Receives Establishment Inspection Report from USFDA",
+    "Natco Pharma Gets US FDA's Establishment Inspection Report For Chennai API Unit",
+    "U.S CRUDE OIL INVENTORIES ACTUAL: 8530K VS -3455K PREVIOUS; EST -24K",
+    "Samvardhana Motherson - : Aims for 16 Million Units Annually, New Plant to Launch in Q3 FY'27",
+    "",
+]
+
+PAIRS = list(combinations(HEADLINES, 2)) + [(h, h) for h in HEADLINES]
+
+
+@pytest.fixture(autouse=True)
+def no_embedding_model(monkeypatch):
+    monkeypatch.setattr(main, "ENABLE_EMBEDDING_DEDUP", False)
+
+
+def _pair_scores(a, b):
+    seq = main.char_similarity(main.context_features(a)[0], main.context_features(b)[0])
+    return seq, main.company_alias_overlap(a, b)
+
+
+@pytest.mark.parametrize("a, b", PAIRS)
+def test_upper_bound_holds_without_embeddings(a, b):
+    seq, company = _pair_scores(a, b)
+    score = main.contextual_similarity_score(a, b, seq_score=seq)
+    assert main.context_score_upper_bound(seq, company) + 1e-9 >= score
+
+
+@pytest.mark.parametrize("embedding_score", [0.0, 0.35, 0.9, 1.0])
+@pytest.mark.parametrize("a, b", PAIRS)
+def test_upper_bound_holds_with_embeddings(a, b, embedding_score):
+    seq, company = _pair_scores(a, b)
+    score = main.contextual_similarity_score(a, b, embedding_score, seq)
+    assert main.context_score_upper_bound(seq, company, embedding_score) + 1e-9 >= score
+
+
+def test_char_similarities_match_pairwise():
+    text = main.context_features(HEADLINES[0])[0]
+    others = [main.context_features(h)[0] for h in HEADLINES]
+    assert main.char_similarities(text, others) == pytest.approx(
+        [main.char_similarity(text, other) for other in others]
+    )
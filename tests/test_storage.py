@@ -0,0 +1,78 @@
+import hashlib
+
+import orjson
+
+import main
+
+
+def _entry(i):
+    return {"headline": f"Headline number {i}", "timestamp": f"{i:02d}:00", "date": "2026-01-01"}
+
+
+def test_legacy_headlines_db_migrates_to_ndjson(state_dir):
+    legacy = [_entry(i) for i in range(5, 0, -1)]  # Newest first, like the old file
+    (state_dir / main.LEGACY_HEADLINES_DB_FILE).write_bytes(orjson.dumps(legacy))
+
+    main.migrate_legacy_headlines_db()
+
+    lines = (state_dir / main.HEADLINES_DB_FILE).read_bytes().splitlines()
+    assert [orjson.loads(line) for line in lines] == legacy[::-1]  # Oldest first on disk
+    assert main.load_headlines_db() == legacy
+
+
+def test_migration_keeps_existing_ndjson(state_dir):
+    (state_dir / main.LEGACY_HEADLINES_DB_FILE).write_bytes(orjson.dumps([_entry(1)]))
+    (state_dir / main.HEADLINES_DB_FILE).write_bytes(orjson.dumps(_entry(2)) + b"\n")
+
+    main.migrate_legacy_headlines_db()
+
+    assert main.load_headlines_db() == [_entry(2)]
+
+
+def test_compaction_keeps_newest_entries(state_dir, monkeypatch):
+    monkeypatch.setattr(main, "HEADLINES_DB_MAX_ENTRIES", 5)
+    saved = []
+    main.add_headline_listener(saved.append)
+
+    for batch in range(4):
+        main.save_headlines_to_db([_entry(batch * 3 + i) for i in range(3)])
+
+    # 12 lines is past twice the maximum, so the file was compacted
+    lines = (state_dir / main.HEADLINES_DB_FILE).read_bytes().splitlines()
+    assert len(lines) <= 2 * main.HEADLINES_DB_MAX_ENTRIES
+    assert main.load_headlines_db() == [_entry(i) for i in range(11, 6, -1)]
+    assert saved == [_entry(i) for i in range(12)]
+
+
+def test_load_skips_torn_lines(state_dir):
+    (state_dir / main.HEADLINES_DB_FILE).write_bytes(
+        orjson.dumps(_entry(1)) + b"\n" + orjson.dumps(_entry(2)) + b"\n{\"headline\": \"tor"
+    )
+    assert main.load_headlines_db() == [_entry(2), _entry(1)]
+
+
+def test_is_seen_accepts_legacy_md5_ids(state_dir):
+    old_headline = "Infosys wins $1.5 billion deal from European client"
+    normalized = main.normalize_headline_for_exact_dedup(old_headline)
+    legacy_id = hashlib.md5(normalized.encode()).hexdigest()
+    (state_dir / main.LEGACY_HISTORY_FILE).write_bytes(orjson.dumps([legacy_id]))
+
+    seen_ids = main.load_seen()
+    headline_normalized, h_id = main.headline_fingerprint(old_headline)
+
+    assert main.is_seen(seen_ids, headline_normalized, h_id)
+    # Also answered from the store once it leaves the in-memory window
+    assert main.is_seen({}, headline_normalized, h_id)
+
+    new_normalized, new_id = main.headline_fingerprint("TCS announces share buyback at Rs 4,500")
+    assert not main.is_seen(seen_ids, new_normalized, new_id)
+
+
+def test_marked_ids_persist_as_blake2b(state_dir):
+    seen_ids = main.load_seen()
+    headline_normalized, h_id = main.headline_fingerprint("HDFC Bank raises Rs 5,000 crore via bonds")
+    main.mark_seen(seen_ids, h_id)
+    main.save_seen(seen_ids)
+
+    assert len(h_id) == 8
+    assert main.is_seen({}, headline_normalized, h_id)